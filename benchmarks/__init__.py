@@ -0,0 +1 @@
+"""Benchmarks for ``dmslogo``, run with `asv <https://asv.readthedocs.io>`_."""
@@ -0,0 +1,98 @@
+"""
+======
+common
+======
+
+Data and helpers shared by the benchmarks.
+"""
+
+
+import resource
+import sys
+
+import matplotlib
+
+matplotlib.use("agg")
+
+import numpy  # noqa: E402
+
+import dmslogo.testing  # noqa: E402
+
+
+#: numbers of sites at which plotting functions are benchmarked
+NSITES = [10, 100, 1000, 10000]
+
+#: most sites of plots rendered with `agg`, as wider images are too large
+MAX_AGG_NSITES = 1000
+
+
+def skip_agg_too_large(nsites, *params):
+    """Setup that skips a benchmark rendering `nsites` sites with `agg`.
+
+    Attach as the `setup` attribute of a benchmark method, which `asv` runs
+    after the class's `setup`. Raising `NotImplementedError` makes `asv`
+    skip that benchmark for these parameters.
+
+    """
+    if nsites > MAX_AGG_NSITES:
+        raise NotImplementedError(f"`agg` cannot render {nsites} sites")
+
+
+def logo_data(
+    nsites,
+    letters_per_site,
+    *,
+    negative=False,
+    noverlays=0,
+    shading=False,
+    ngroups=1,
+    seed=0,
+):
+    """Simulated data for benchmarks from :mod:`dmslogo.testing`.
+
+    Args:
+        `nsites` (int)
+            Number of sites.
+        `letters_per_site` (int)
+            Average number of different amino acids at each site.
+        `negative` (bool)
+            Make half of the letter heights negative.
+        `noverlays` (int)
+            Number of overlay columns ``overlay_0``, ``overlay_1``, ...
+        `shading` (bool)
+            Add ``shade_color`` and ``shade_alpha`` columns shading every
+            third site.
+        `ngroups` (int)
+            Number of values in a ``group`` column, each with all sites.
+        `seed` (int)
+            Seed for random number generator.
+
+    Returns:
+        Data frame from :func:`dmslogo.testing.simulate_dms_data` plus any
+        shading columns.
+
+    """
+    df = dmslogo.testing.simulate_dms_data(
+        nsites,
+        sparsity=1 - letters_per_site / len(dmslogo.testing.AMINO_ACIDS),
+        negative_fraction=0.5 if negative else 0,
+        facets={"group": ngroups},
+        noverlays=noverlays,
+        seed=seed,
+    )
+    if shading:
+        df["shade_color"] = numpy.where(df["site"] % 3 == 0, "#999999", "")
+        df["shade_alpha"] = 0.3
+    return df
+
+
+def count_artists(fig):
+    """Number of artists in `fig`, including the figure itself."""
+    return len(fig.findobj())
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,104 @@
+"""
+======
+memory
+======
+
+Benchmarks of memory use when drawing many logo plots in one process.
+
+The `track_` benchmarks return the growth in peak resident memory over
+many renders after a warm-up, which should stay close to zero if figures
+are freed after each render. They fail if it exceeds `max_growth`, so a
+leak shows up as a failed benchmark rather than only a larger number.
+
+The continuous integration tests also run these checks without `asv`:
+
+    python -m benchmarks.memory
+
+which exits with an error if memory grows too much.
+"""
+
+
+import pandas as pd
+
+import dmslogo
+import dmslogo.utils
+
+from .common import peak_rss_mb
+
+
+class MemoryGrowth:
+    """Growth in peak memory over many renders of a small logo plot."""
+
+    timeout = 1800
+    unit = "MB"
+    number = 1
+    repeat = 1
+
+    nwarmup = 500
+    nrenders = 10000
+
+    # keeping each cleared figure alive grows memory about 0.2 MB per render
+    max_growth = 50
+
+    def setup(self):
+        """Data for a small logo plot."""
+        self.data = pd.DataFrame(
+            {
+                "site": [1, 1, 2, 3, 3, 3],
+                "letter": ["A", "C", "G", "A", "W", "Y"],
+                "height": [1.0, 0.5, 2.0, 0.4, 0.3, 1.2],
+            }
+        )
+
+    def _render(self):
+        """Draw and save a logo plot, freeing the figure."""
+        with dmslogo.utils.pyplot_free():
+            fig, _ = dmslogo.draw_logo(
+                self.data, x_col="site", letter_col="letter", letter_height_col="height"
+            )
+            fig.canvas.draw()
+
+    def _render_with_error(self):
+        """Draw a logo plot that fails after its figure is created."""
+        try:
+            dmslogo.draw_logo(
+                self.data,
+                x_col="site",
+                letter_col="letter",
+                letter_height_col="height",
+                fixed_ymax=0.1,
+            )
+        except ValueError:
+            pass
+        else:
+            raise RuntimeError("expected `draw_logo` to fail")
+
+    def _growth(self, render):
+        for _ in range(self.nwarmup):
+            render()
+        start = peak_rss_mb()
+        for _ in range(self.nrenders):
+            render()
+        growth = peak_rss_mb() - start
+        if growth > self.max_growth:
+            raise RuntimeError(
+                f"memory grew {growth:.1f} MB over {self.nrenders} renders, "
+                f"more than {self.max_growth} MB"
+            )
+        return growth
+
+    def track_growth_pyplot_free(self):
+        """Memory growth over renders within :func:`dmslogo.utils.pyplot_free`."""
+        return self._growth(self._render)
+
+    def track_growth_on_error(self):
+        """Memory growth over `pyplot` renders that raise an exception."""
+        return self._growth(self._render_with_error)
+
+
+if __name__ == "__main__":
+    benchmark = MemoryGrowth()
+    benchmark.setup()
+    for name in ["track_growth_pyplot_free", "track_growth_on_error"]:
+        growth = getattr(benchmark, name)()
+        print(f"{name}: {growth:.1f} MB over {benchmark.nrenders} renders")
@@ -0,0 +1,361 @@
+"""
+========
+plotting
+========
+
+Benchmarks of the plotting functions across data sizes.
+
+For each plot there are `time_` benchmarks of creating the plot and of also
+rendering it, a `peakmem_` benchmark of the peak memory when rendering it,
+and a `track_` benchmark of the number of artists in the figure.
+"""
+
+
+import io
+
+import numpy
+
+import pandas as pd
+
+import dmslogo
+import dmslogo.colorschemes
+import dmslogo.heights
+import dmslogo.layout
+import dmslogo.utils
+
+from .common import NSITES, count_artists, logo_data, skip_agg_too_large
+
+
+class _PlotBenchmark:
+    """Base class for benchmarks of a function that creates a figure.
+
+    Subclasses define `setup` and `_plot`, which returns the figure. The
+    first parameter is the number of sites, and benchmarks that render the
+    figure with `agg` are skipped for more than
+    :data:`common.MAX_AGG_NSITES` sites.
+
+    """
+
+    timeout = 600
+
+    def _render(self):
+        """Create and render plot, returning number of artists."""
+        with dmslogo.utils.pyplot_free():
+            fig = self._plot()
+            fig.canvas.draw()
+            return count_artists(fig)
+
+    def time_plot(self, *params):
+        """Create the plot."""
+        with dmslogo.utils.pyplot_free():
+            self._plot()
+
+    def time_plot_and_render(self, *params):
+        """Create and render the plot."""
+        self._render()
+
+    time_plot_and_render.setup = skip_agg_too_large
+
+    def peakmem_plot_and_render(self, *params):
+        """Create and render the plot."""
+        self._render()
+
+    peakmem_plot_and_render.setup = skip_agg_too_large
+
+    def track_artists(self, *params):
+        """Number of artists in the plot."""
+        with dmslogo.utils.pyplot_free():
+            return count_artists(self._plot())
+
+    track_artists.unit = "artists"
+
+    def _savefig(self, fmt):
+        """Create the plot and save it in format `fmt`, returning the file."""
+        with dmslogo.utils.pyplot_free():
+            f = io.BytesIO()
+            self._plot().savefig(f, format=fmt)
+            return f.getvalue()
+
+
+class DrawLogo(_PlotBenchmark):
+    """:func:`dmslogo.logo.draw_logo` with different numbers of letters."""
+
+    params = (NSITES, [1, 5, 20])
+    param_names = ["nsites", "letters_per_site"]
+
+    def setup(self, nsites, letters_per_site):
+        self.data = logo_data(nsites, letters_per_site)
+
+    def _plot(self):
+        fig, _ = dmslogo.draw_logo(
+            self.data,
+            x_col="site",
+            letter_col="letter",
+            letter_height_col="height",
+            xtick_col="site_label",
+        )
+        return fig
+
+    def time_plot_and_savefig_svg(self, *params):
+        """Create the plot and save it as SVG."""
+        self._savefig("svg")
+
+    def track_svg_kilobytes(self, *params):
+        """Size of the plot saved as SVG."""
+        return len(self._savefig("svg")) / 1024
+
+    track_svg_kilobytes.unit = "kilobytes"
+
+    def time_plot_and_savefig_pdf(self, *params):
+        """Create the plot and save it as PDF."""
+        self._savefig("pdf")
+
+    def track_pdf_kilobytes(self, *params):
+        """Size of the plot saved as PDF."""
+        return len(self._savefig("pdf")) / 1024
+
+    track_pdf_kilobytes.unit = "kilobytes"
+
+
+class DrawLogoBackend(_PlotBenchmark):
+    """:func:`dmslogo.logo.draw_logo` with each `backend`, saved as PNG.
+
+    Only up to 1000 sites, as larger logos exceed the maximum image size
+    of the `agg` backend.
+
+    """
+
+    params = ([10, 100, 1000], ["vector", "raster"])
+    param_names = ["nsites", "backend"]
+
+    def setup(self, nsites, backend):
+        self.data = logo_data(nsites, 20)
+        self.backend = backend
+
+    def _plot(self):
+        fig, _ = dmslogo.draw_logo(
+            self.data,
+            x_col="site",
+            letter_col="letter",
+            letter_height_col="height",
+            xtick_col="site_label",
+            backend=self.backend,
+        )
+        return fig
+
+    def time_plot_and_savefig_png(self, *params):
+        """Create the plot and save it as PNG."""
+        with dmslogo.utils.pyplot_free():
+            fig = self._plot()
+            fig.savefig(io.BytesIO(), format="png", dpi=fig.dpi)
+
+
+class DrawLogoSparse(_PlotBenchmark):
+    """:func:`dmslogo.logo.draw_logo` where most letters are near zero.
+
+    With and without `min_visible_height`, saved as SVG.
+
+    """
+
+    params = ([10, 100, 1000], [None, "0.5px"])
+    param_names = ["nsites", "min_visible_height"]
+
+    def setup(self, nsites, min_visible_height):
+        self.data = logo_data(nsites, 20)
+        # only about one in twenty letters has a visible height
+        rng = numpy.random.default_rng(0)
+        self.data["height"] = numpy.where(
+            rng.random(len(self.data)) < 0.05,
+            self.data["height"],
+            1e-4 * self.data["height"],
+        )
+        self.min_visible_height = min_visible_height
+
+    def _plot(self):
+        fig, _ = dmslogo.draw_logo(
+            self.data,
+            x_col="site",
+            letter_col="letter",
+            letter_height_col="height",
+            xtick_col="site_label",
+            min_visible_height=self.min_visible_height,
+        )
+        return fig
+
+    def time_plot_and_savefig_svg(self, *params):
+        """Create the plot and save it as SVG."""
+        self._savefig("svg")
+
+    def track_svg_kilobytes(self, *params):
+        """Size of the plot saved as SVG."""
+        return len(self._savefig("svg")) / 1024
+
+    track_svg_kilobytes.unit = "kilobytes"
+
+
+class DrawLogoFeatures(_PlotBenchmark):
+    """:func:`dmslogo.logo.draw_logo` with optional features of the plots."""
+
+    params = (NSITES, ["negative", "overlays", "shading"])
+    param_names = ["nsites", "feature"]
+
+    def setup(self, nsites, feature):
+        self.data = logo_data(
+            nsites,
+            5,
+            negative=feature == "negative",
+            noverlays=2 if feature == "overlays" else 0,
+            shading=feature == "shading",
+        )
+        self.kwargs = {
+            "negative": {},
+            "overlays": {"heatmap_overlays": ["overlay_0", "overlay_1"]},
+            "shading": {
+                "shade_color_col": "shade_color",
+                "shade_alpha_col": "shade_alpha",
+            },
+        }[feature]
+
+    def _plot(self):
+        fig, _ = dmslogo.draw_logo(
+            self.data,
+            x_col="site",
+            letter_col="letter",
+            letter_height_col="height",
+            xtick_col="site_label",
+            **self.kwargs,
+        )
+        return fig
+
+
+class DrawLine(_PlotBenchmark):
+    """:func:`dmslogo.line.draw_line`."""
+
+    params = NSITES
+    param_names = ["nsites"]
+
+    def setup(self, nsites):
+        self.data = logo_data(nsites, 1)
+
+    def _plot(self):
+        fig, _ = dmslogo.draw_line(
+            self.data,
+            x_col="site",
+            height_col="site_height",
+            xtick_col="site_label",
+            show_col="show",
+        )
+        return fig
+
+
+class FacetPlot(_PlotBenchmark):
+    """:func:`dmslogo.facet.facet_plot` of lines and logos in three rows.
+
+    About a tenth of the sites are shown in the logo plots. Only up to
+    1000 sites, as `facet_plot` draws the figure with `agg` to lay it out.
+
+    """
+
+    params = [nsites for nsites in NSITES if nsites <= 1000]
+    param_names = ["nsites"]
+
+    def setup(self, nsites):
+        self.data = logo_data(nsites, 5, ngroups=3)
+
+    def _plot(self):
+        fig, _ = dmslogo.facet_plot(
+            self.data,
+            x_col="site",
+            show_col="show",
+            gridrow_col="group",
+            draw_line_kwargs={"height_col": "site_height", "xtick_col": "site_label"},
+            draw_logo_kwargs={
+                "letter_col": "letter",
+                "letter_height_col": "height",
+                "xtick_col": "site_label",
+            },
+        )
+        return fig
+
+
+class LayoutMatrix:
+    """Layout of a logo from a site by letter matrix, or from long data.
+
+    Compares :meth:`dmslogo.layout.LogoLayout.from_matrix` with melting
+    the matrix into long format for :class:`dmslogo.layout.LogoLayout`.
+
+    """
+
+    params = (NSITES + [100000], ["matrix", "melt"])
+    param_names = ["nsites", "input"]
+
+    def setup(self, nsites, input):
+        alphabet = list(dmslogo.colorschemes.AA_FUNCTIONAL_GROUP)[:20]
+        self.heights = pd.DataFrame(
+            numpy.random.default_rng(0).random((nsites, len(alphabet))),
+            index=pd.Index(numpy.arange(1, nsites + 1), name="site"),
+            columns=pd.Index(alphabet, name="letter"),
+        )
+
+    def time_layout(self, nsites, input):
+        if input == "matrix":
+            dmslogo.layout.LogoLayout.from_matrix(self.heights)
+        else:
+            dmslogo.layout.LogoLayout(
+                self.heights.stack().rename("height").reset_index(),
+                x_col="site",
+                letter_col="letter",
+                letter_height_col="height",
+            )
+
+    def peakmem_layout(self, nsites, input):
+        self.time_layout(nsites, input)
+
+
+class Heights:
+    """Letter heights from a site by letter matrix of frequencies."""
+
+    params = NSITES + [100000]
+    param_names = ["nsites"]
+
+    def setup(self, nsites):
+        self.freqs = numpy.random.default_rng(0).random((nsites, 20))
+
+    def time_information_heights(self, nsites):
+        dmslogo.heights.information_heights(self.freqs, nseqs=100)
+
+    def time_relative_entropy_heights(self, nsites):
+        dmslogo.heights.relative_entropy_heights(self.freqs, numpy.full(20, 0.05))
+
+    def time_to_long(self, nsites):
+        dmslogo.heights.to_long(self.freqs, alphabet="ACDEFGHIKLMNPQRSTVWY")
+
+
+class ValToColor:
+    """:meth:`dmslogo.colorschemes.ValueToColorMap.val_to_color`."""
+
+    params = NSITES
+    param_names = ["nsites"]
+
+    def setup(self, nsites):
+        self.values = logo_data(nsites, 1)["site_height"].to_numpy()
+        self.colormap = dmslogo.colorschemes.ValueToColorMap(
+            self.values.min(), self.values.max()
+        )
+
+    def time_val_to_color(self, nsites):
+        self.colormap.val_to_color(self.values)
+
+
+class BreaksAndLabels:
+    """:func:`dmslogo.utils.breaksAndLabels`."""
+
+    params = NSITES
+    param_names = ["nsites"]
+
+    def setup(self, nsites):
+        self.xi = list(range(nsites))
+        self.x = [str(i + 1) for i in self.xi]
+
+    def time_breaks_and_labels(self, nsites):
+        dmslogo.utils.breaksAndLabels(self.xi, self.x, 10)
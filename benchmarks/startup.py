@@ -0,0 +1,23 @@
+"""
+========
+startup
+========
+
+Benchmarks of the time it takes to import ``dmslogo``.
+
+Each `timeraw_` benchmark is run by `asv` in a fresh interpreter, so it
+includes all of the work done at import time.
+"""
+
+
+def timeraw_import_dmslogo():
+    """Import ``dmslogo``, registering only the bundled fonts."""
+    return "import dmslogo"
+
+
+def timeraw_import_dmslogo_and_scan_system_fonts():
+    """Import ``dmslogo`` and scan all system fonts as was done at import."""
+    return """
+    import dmslogo.logo
+    dmslogo.logo._add_system_fonts()
+    """
@@ -9,6 +9,9 @@ Importing this package imports the following main functions
 into the package namespace:
 
  - :py:mod:`dmslogo.logo.draw_logo`
+ - :py:mod:`dmslogo.logo.draw_logo_layout`
+ - :py:mod:`dmslogo.logo.draw_logo_matrix`
+ - :py:mod:`dmslogo.layout.LogoLayout`
  - :py:mod:`dmslogo.line.draw_line`
  - :py:mod:`dmslogo.facet.facet_plot`
 """
@@ -19,5 +22,6 @@ __version__ = "0.7.0"
 __url__ = "https://github.com/jbloomlab/dmslogo"
 
 from dmslogo.facet import facet_plot  # noqa: F401
+from dmslogo.layout import LogoLayout  # noqa: F401
 from dmslogo.line import draw_line  # noqa: F401
-from dmslogo.logo import draw_logo  # noqa: F401
+from dmslogo.logo import draw_logo, draw_logo_layout, draw_logo_matrix  # noqa: F401
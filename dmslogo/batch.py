@@ -0,0 +1,210 @@
+"""
+=======
+batch
+=======
+
+Draw many logo plots to files.
+"""
+
+
+import collections
+import concurrent.futures
+import os
+import string
+import time
+
+import matplotlib
+
+import pandas as pd
+
+import dmslogo.logo
+import dmslogo.profiling
+import dmslogo.utils
+
+
+def render_many(
+    data,
+    *,
+    groupby,
+    output_pattern,
+    n_jobs=None,
+    max_pending=None,
+    savefig_kwargs=None,
+    **draw_logo_kwargs,
+):
+    """Draw a logo plot for each group in a data frame and save to files.
+
+    Args:
+        `data` (pandas DataFrame)
+            Holds data for all the logo plots.
+        `groupby` (str or list)
+            Column(s) in `data` that define the groups. A logo plot is drawn
+            for each group.
+        `output_pattern` (str)
+            Pattern for name of the file for each group, which is formatted
+            with `str.format` using the values of the `groupby` columns both
+            by position and by column name, such as ``"logos/{antibody}.png"``.
+            The file format (e.g., PNG, PDF, SVG) is inferred from the
+            extension, and directories are created as needed.
+        `n_jobs` (`None` or int)
+            Number of worker processes, or -1 to use all CPUs. If `None` or 1,
+            the plots are drawn in the current process.
+        `max_pending` (`None` or int)
+            Maximum number of groups sent to the workers but not yet finished,
+            which bounds memory use. By default twice `n_jobs`.
+        `savefig_kwargs` (`None` or dict)
+            Keyword arguments for `savefig`, such as ``{"dpi": 150}``.
+        `**draw_logo_kwargs`
+            Keyword arguments for :func:`dmslogo.logo.draw_logo`, which
+            cannot include `ax` or `dry_run`.
+
+    Returns:
+        A pandas DataFrame with a row for each group in the order of `data`.
+        There are columns for each of the `groupby` columns, plus `output`
+        (name of the file), `seconds` (time to draw and save the plot), and
+        `error` (`None` if the plot was saved, otherwise the error message).
+
+    Each plot is drawn and saved within :func:`dmslogo.utils.pyplot_free`,
+    so its figure is freed before the next plot is drawn, and groups are
+    only sent to the workers as earlier ones finish. The workers load the
+    font metrics and glyph outlines when they start so this is not repeated
+    for each plot.
+
+    An error drawing one plot does not stop the others; check the `error`
+    column of the returned data frame:
+
+    >>> import tempfile
+    >>> data = pd.DataFrame({'antibody': ['a', 'a', 'b', 'c', 'c'],
+    ...                      'site': [1, 2, 1, 1, 1],
+    ...                      'letter': ['A', 'C', 'A', 'G', 'G'],
+    ...                      'height': [1.0, 0.5, 2.0, 1.0, 0.5]})
+    >>> with tempfile.TemporaryDirectory() as tmpdir:
+    ...     results = render_many(data,
+    ...                           groupby='antibody',
+    ...                           output_pattern=tmpdir + '/{antibody}.png',
+    ...                           n_jobs=2,
+    ...                           x_col='site',
+    ...                           letter_col='letter',
+    ...                           letter_height_col='height')
+    ...     saved = sorted(os.listdir(tmpdir))
+    >>> saved
+    ['a.png', 'b.png']
+    >>> results['antibody'].tolist()
+    ['a', 'b', 'c']
+    >>> results['error'].tolist()
+    [None, None, 'ValueError: duplicate letters for `x_col` 1']
+    >>> bool((results['seconds'] > 0).all())
+    True
+
+    """
+    for key in ["ax", "dry_run"]:
+        if key in draw_logo_kwargs:
+            raise ValueError(f"cannot pass `{key}` to `render_many`")
+    if savefig_kwargs is None:
+        savefig_kwargs = {}
+
+    if isinstance(groupby, str):
+        groupby = [groupby]
+    else:
+        groupby = list(groupby)
+    if not set(groupby).issubset(data.columns):
+        raise ValueError(f"`data` lacks `groupby` columns {groupby}")
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs is None:
+        n_jobs = 1
+    if n_jobs < 1:
+        raise ValueError(f"invalid `n_jobs` of {n_jobs}")
+    if max_pending is None:
+        max_pending = 2 * n_jobs
+    if max_pending < 1:
+        raise ValueError(f"invalid `max_pending` of {max_pending}")
+
+    tasks = _tasks(data, groupby, output_pattern)
+
+    results = []
+    if n_jobs == 1:
+        for keys, output, group_data in tasks:
+            results.append(
+                (keys, output)
+                + _render_one(group_data, output, draw_logo_kwargs, savefig_kwargs)
+            )
+    else:
+        fontfamily = draw_logo_kwargs.get("fontfamily", dmslogo.logo._DEFAULT_FONT)
+        with concurrent.futures.ProcessPoolExecutor(
+            n_jobs, initializer=_init_worker, initargs=(fontfamily,)
+        ) as executor:
+            # futures in order submitted, only `max_pending` not yet done
+            pending = collections.deque()
+            for keys, output, group_data in tasks:
+                while len(pending) >= max_pending:
+                    results.append(_collect(pending.popleft()))
+                future = executor.submit(
+                    _render_one, group_data, output, draw_logo_kwargs, savefig_kwargs
+                )
+                pending.append((keys, output, future))
+            while pending:
+                results.append(_collect(pending.popleft()))
+
+    return pd.DataFrame(
+        [(*keys, output, seconds, error) for keys, output, seconds, error in results],
+        columns=[*groupby, "output", "seconds", "error"],
+    )
+
+
+def _tasks(data, groupby, output_pattern):
+    """Generate `(keys, output, group_data)` for each group in :func:`render_many`."""
+    for keys, group_data in data.groupby(groupby, sort=False, observed=True):
+        if not isinstance(keys, tuple):
+            keys = (keys,)
+        named_keys = {
+            col: key
+            for col, key in zip(groupby, keys)
+            if isinstance(col, str) and col.isidentifier()
+        }
+        yield keys, output_pattern.format(*keys, **named_keys), group_data
+
+
+def _collect(pending_item):
+    """Wait for a submitted plot and return its result for :func:`render_many`."""
+    keys, output, future = pending_item
+    return (keys, output) + future.result()
+
+
+def _render_one(data, output, draw_logo_kwargs, savefig_kwargs):
+    """Draw a logo plot and save it to `output`.
+
+    Returns:
+        The 2-tuple `(seconds, error)` where `error` is `None` if the plot
+        was saved and otherwise a string describing the exception.
+
+    """
+    start = time.perf_counter()
+    try:
+        with dmslogo.utils.pyplot_free():
+            fig, _ = dmslogo.logo.draw_logo(data, **draw_logo_kwargs)
+            outdir = os.path.dirname(output)
+            if outdir:
+                os.makedirs(outdir, exist_ok=True)
+            with dmslogo.profiling.phase("savefig"):
+                fig.savefig(output, **savefig_kwargs)
+        error = None
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    return time.perf_counter() - start, error
+
+
+def _init_worker(fontfamily):
+    """Load fonts and glyph outlines in a worker process of :func:`render_many`."""
+    matplotlib.use("agg")
+    dmslogo.logo._ensure_font(fontfamily)
+    dmslogo.logo._font_letter_extents(fontfamily)
+    for letter in string.ascii_uppercase + string.digits:
+        dmslogo.logo._glyph_path(letter, fontfamily)
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
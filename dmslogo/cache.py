@@ -0,0 +1,191 @@
+"""
+=======
+cache
+=======
+
+Bounded in-memory caches used by `dmslogo`.
+
+Values that are slow to compute and used repeatedly (such as font
+properties, letter metrics, glyph outlines, and colors) are cached with
+:func:`lru_cache`. Each cache holds at most a fixed number of values and
+discards the least recently used one when full. Use :func:`cache_info` to
+see how well each cache is working, :func:`set_maxsize` to change how many
+values it can hold, and :func:`clear_caches` to free the memory.
+
+>>> @lru_cache(maxsize=2, name="square")
+... def square(x):
+...     return x * x
+>>> [square(x) for x in [1, 2, 1, 3, 2]]
+[1, 4, 1, 9, 4]
+>>> cache_info()["square"]
+CacheInfo(hits=1, misses=4, maxsize=2, currsize=2)
+>>> set_maxsize("square", 1)
+>>> cache_info()["square"]
+CacheInfo(hits=1, misses=4, maxsize=1, currsize=1)
+>>> clear_caches()
+>>> cache_info()["square"]
+CacheInfo(hits=0, misses=0, maxsize=1, currsize=0)
+>>> del _CACHES["square"]
+
+"""
+
+
+import collections
+import functools
+import threading
+
+
+#: Statistics for a cache returned by :func:`cache_info`.
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize"]
+)
+
+# all caches created by `lru_cache` keyed by name
+_CACHES = {}
+
+# separates positional from keyword arguments in cache keys
+_KWARGS_MARK = object()
+
+
+class LRUCache:
+    """Cache of values returned by a function with least-recently-used eviction.
+
+    Args:
+        `func` (callable)
+            Function with hashable arguments to cache.
+        `maxsize` (int or `None`)
+            Maximum number of values held, or `None` for no limit.
+
+    Calls with arguments that cannot be hashed are passed straight to `func`
+    and counted as misses. The cache is protected by a lock so it can be used
+    from several threads. The function is called without holding the lock, so
+    if two threads request the same uncached value it may be computed twice,
+    but all callers get the value that was stored first.
+
+    """
+
+    def __init__(self, func, maxsize=128):
+        """See main class docstring."""
+        self.func = func
+        self.maxsize = maxsize
+        self._values = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        """Cached value of `func(*args, **kwargs)`."""
+        key = args + (_KWARGS_MARK, *sorted(kwargs.items())) if kwargs else args
+        try:
+            hash(key)
+        except TypeError:
+            with self._lock:
+                self._misses += 1
+            return self.func(*args, **kwargs)
+        with self._lock:
+            if key in self._values:
+                self._hits += 1
+                self._values.move_to_end(key)
+                return self._values[key]
+            self._misses += 1
+        value = self.func(*args, **kwargs)
+        with self._lock:
+            value = self._values.setdefault(key, value)
+            self._values.move_to_end(key)
+            self._evict()
+        return value
+
+    def _evict(self):
+        """Remove least recently used values until within `maxsize`."""
+        if self.maxsize is not None:
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+    def cache_info(self):
+        """Statistics for cache as a :data:`CacheInfo`."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._values))
+
+    def cache_clear(self):
+        """Remove all values from cache and reset statistics."""
+        with self._lock:
+            self._values.clear()
+            self._hits = self._misses = 0
+
+    def set_maxsize(self, maxsize):
+        """Change maximum number of values held, evicting values if needed."""
+        if maxsize is not None and maxsize < 0:
+            raise ValueError(f"invalid `maxsize` of {maxsize}")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+
+def lru_cache(maxsize=128, *, name=None):
+    """Decorator that caches a function with an :class:`LRUCache`.
+
+    Args:
+        `maxsize` (int or `None`)
+            Maximum number of values held, or `None` for no limit.
+        `name` (`None` or str)
+            Name of cache in :func:`cache_info`, by default the qualified
+            name of the function.
+
+    Returns:
+        Decorator that wraps the function in an :class:`LRUCache`.
+
+    """
+
+    def decorator(func):
+        cache = LRUCache(func, maxsize)
+        cache_name = (
+            name if name is not None else f"{func.__module__}.{func.__qualname__}"
+        )
+        if cache_name in _CACHES:
+            raise ValueError(f"already a cache named {cache_name}")
+        _CACHES[cache_name] = cache
+        return cache
+
+    return decorator
+
+
+def cache_info():
+    """Statistics for all caches.
+
+    Returns:
+        Dict keyed by cache name with values giving the :data:`CacheInfo`.
+
+    """
+    return {name: cache.cache_info() for name, cache in _CACHES.items()}
+
+
+def set_maxsize(name, maxsize):
+    """Change the maximum number of values held by a cache.
+
+    Args:
+        `name` (str)
+            Name of cache as in :func:`cache_info`.
+        `maxsize` (int or `None`)
+            Maximum number of values held, or `None` for no limit.
+
+    """
+    if name not in _CACHES:
+        raise ValueError(f"no cache named {name}")
+    _CACHES[name].set_maxsize(maxsize)
+
+
+def clear_caches():
+    """Remove all values from all caches and reset their statistics.
+
+    This only clears the in-memory caches, not the on-disk cache of
+    font metrics described in :mod:`dmslogo.logo`.
+
+    """
+    for cache in _CACHES.values():
+        cache.cache_clear()
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -12,6 +12,8 @@ import matplotlib.pyplot as plt
 
 import numpy
 
+import dmslogo.utils
+
 
 #: color-blind safe palette with gray, from
 #: http://bconnelly.net/2013/10/creating-colorblind-friendly-figures
@@ -245,6 +247,7 @@ class ValueToColorMap:
         else:
             return colors
 
+    @dmslogo.utils._close_new_figures_on_error
     def scale_bar(
         self,
         *,
@@ -293,7 +296,7 @@ class ValueToColorMap:
             raise ValueError(f"invalid `orientation` of {orientation}")
 
         if ax is None:
-            _, ax = plt.subplots(figsize=figsize)
+            _, ax = dmslogo.utils.subplots(figsize=figsize)
 
         ax.imshow(
             colors,
@@ -8,15 +8,19 @@ Facet multiple plots on the same figure.
 
 
 import collections
+import inspect
 import operator
 
-import matplotlib.pyplot as plt
-
 import numpy
 
 import dmslogo
+import dmslogo.logo
+import dmslogo.profiling
+import dmslogo.utils
+import dmslogo.validation
 
 
+@dmslogo.utils._close_new_figures_on_error
 def facet_plot(
     data,
     *,
@@ -106,6 +110,8 @@ def facet_plot(
     for all groups in being faceted over.
 
     """
+    phases = dmslogo.profiling._PhaseSequence()
+    phases.enter("validation")
     if gridrow_col is None:
         gridrow_col = "_gridrow_col_"
         if gridrow_col in data.columns:
@@ -154,7 +160,7 @@ def facet_plot(
     ]
     for name, kwargs, titlesuffix in possible_funcs:
         if kwargs is not None:
-            for col in ["ax", "title"]:
+            for col in ["ax", "title", "dry_run"]:
                 if col in kwargs:
                     raise ValueError(f"{name}_kwargs can't have {col}")
             if "heightscale" in kwargs:
@@ -193,26 +199,35 @@ def facet_plot(
             if (colname != "show_col") or (name == "draw_line"):
                 name_d["kwargs"][colname] = col
 
+    # check the data of each plotting function once, then skip the checks
+    # when drawing each panel
+    validators = {
+        "draw_line": dmslogo.validation.validate_line_data,
+        "draw_logo": dmslogo.validation.validate_logo_data,
+    }
+    for name, name_d in draw_funcs.items():
+        if name_d["kwargs"].get("validate", True):
+            params = inspect.signature(validators[name]).parameters
+            validators[name](
+                name_d["data"],
+                by=[gridrow_col, gridcol_col],
+                **{key: val for key, val in name_d["kwargs"].items() if key in params},
+            )
+            name_d["kwargs"] = {**name_d["kwargs"], "validate": False}
+
     nrows = len(data[gridrow_col].unique())
     nfuncs = len(draw_funcs)
     ncols_per_func = len(data[gridcol_col].unique())
 
     # get sizes of fig, axis limits of plots for each func
+    phases.enter("sizing")
     fixed_ylims = {"min": {}, "max": {}}  # keys 'min' / 'max', then row name
     for name, name_d in draw_funcs.items():
         for (row, _), idata in name_d["data"].groupby([gridrow_col, gridcol_col]):
-            fig, ax = name_d["func"](idata, **name_d["kwargs"])
-            fig.tight_layout()
-            width = fig.get_size_inches()[0]
-            xticks = list(ax.get_xticks())
-            xticklabels = [t.get_text() for t in ax.get_xticklabels()]
-            ymin, ymax = ax.get_ylim()
-            plt.close(fig)
-            for key, val in [
-                ("width", width),
-                ("xticks", xticks),
-                ("xticklabels", xticklabels),
-            ]:
+            sizes = name_d["func"](idata, dry_run=True, **name_d["kwargs"])
+            ymin, ymax = sizes["ylim"]
+            for key in ["width", "xticks", "xticklabels"]:
+                val = sizes[key]
                 if key not in name_d:
                     name_d[key] = val
                 elif name_d[key] != val:
@@ -265,7 +280,8 @@ def facet_plot(
                     fixed_ylims[ltype][row] = setlim[row]
 
     # make figure
-    fig, axes = plt.subplots(
+    phases.close()
+    fig, axes = dmslogo.utils.subplots(
         nrows,
         nfuncs * ncols_per_func,
         squeeze=False,
@@ -292,12 +308,22 @@ def facet_plot(
     )
 
     # Add plots, adjust to tight layout
-    axes_has_plot = _draw_facet_plots(
-        axes, draw_funcs, ncols_per_func, gridrow_col, gridcol_col, nrows, fixed_ylims
-    )
-    fig.canvas.draw()
+    with dmslogo.profiling._artists_counted_by_caller():
+        axes_has_plot = _draw_facet_plots(
+            axes,
+            draw_funcs,
+            ncols_per_func,
+            gridrow_col,
+            gridcol_col,
+            nrows,
+            fixed_ylims,
+        )
+    with dmslogo.profiling.phase("canvas_draw"):
+        fig.canvas.draw()
+    dmslogo.profiling.count("canvas_draws")
 
     # only show one label for aligned axes
+    phases.enter("axes")
     assert axes.shape == (nrows, nfuncs * ncols_per_func)
 
     if share_xlabel:
@@ -343,6 +369,8 @@ def facet_plot(
         if not has_plot:
             ax.clear()
             ax.set_axis_off()
+    phases.close()
+    dmslogo.profiling._count_artists_created(fig, 0)
 
     return fig, axes
 
@@ -426,7 +454,13 @@ def _axes_to_centered_fig_label(fig, axlist, axistype):
 
 
 def _draw_facet_plots(
-    axes, draw_funcs, ncols_per_func, gridrow_col, gridcol_col, nrows, fixed_ylims
+    axes,
+    draw_funcs,
+    ncols_per_func,
+    gridrow_col,
+    gridcol_col,
+    nrows,
+    fixed_ylims,
 ):
     """Draws plots on axes for :func:`facet_plots`.
 
@@ -437,7 +471,8 @@ def _draw_facet_plots(
 
     """
     axes_has_plot = numpy.ndarray(axes.shape, dtype="bool")
-    for ifunc, func_d in enumerate(draw_funcs.values()):
+    panels = []
+    for ifunc, (name, func_d) in enumerate(draw_funcs.items()):
         groups = [
             (row_name, row_data)
             for row_name, row_data in func_d["data"].groupby(gridrow_col)
@@ -463,7 +498,6 @@ def _draw_facet_plots(
 
             for icol in range(ncols_per_func):
                 colnum = ifunc * ncols_per_func + icol
-                ax = axes[irow, colnum]
 
                 if icol < len(row_groups):
                     col_name, col_data = row_groups[icol]
@@ -480,21 +514,40 @@ def _draw_facet_plots(
                     axes_has_plot[irow, colnum] = False
                     title = "dummy data (error if you see this)"
 
-                func_d["func"](
-                    col_data,
-                    ax=ax,
-                    title=title,
-                    fixed_ymin=fixed_ylims["min"][row_name],
-                    fixed_ymax=fixed_ylims["max"][row_name],
-                    **func_d["kwargs"],
+                panels.append(
+                    {
+                        "name": name,
+                        "func_d": func_d,
+                        "irow": irow,
+                        "icol": icol,
+                        "ax": axes[irow, colnum],
+                        "data": col_data,
+                        "title": title,
+                        "ylim": (
+                            fixed_ylims["min"][row_name],
+                            fixed_ylims["max"][row_name],
+                        ),
+                        "has_plot": axes_has_plot[irow, colnum],
+                    }
                 )
 
-                if irow != nrows - 1:
-                    ax.set_xlabel("")
-                    ax.set_xticklabels([])
-                if icol != 0:
-                    ax.set_ylabel("")
-                    ax.set_yticklabels([])
+    for panel in panels:
+        panel["func_d"]["func"](
+            panel["data"],
+            ax=panel["ax"],
+            title=panel["title"],
+            fixed_ymin=panel["ylim"][0],
+            fixed_ymax=panel["ylim"][1],
+            **panel["func_d"]["kwargs"],
+        )
+
+    for panel in panels:
+        if panel["irow"] != nrows - 1:
+            panel["ax"].set_xlabel("")
+            panel["ax"].set_xticklabels([])
+        if panel["icol"] != 0:
+            panel["ax"].set_ylabel("")
+            panel["ax"].set_yticklabels([])
 
     return axes_has_plot
 
@@ -0,0 +1,294 @@
+"""
+=======
+heights
+=======
+
+Compute letter heights for logo plots from frequencies or preferences.
+
+Each function takes a matrix with a row for each site and a column for each
+letter, as a 2-D `numpy` array or a `pandas` data frame, and computes the
+result for all sites at once with array operations. Matrices of heights are
+returned in the same type as the input, so a data frame keeps its index of
+sites and columns of letters, and can be drawn directly with
+:func:`dmslogo.logo.draw_logo_matrix` or converted with :func:`to_long` to
+the long format taken by :func:`dmslogo.logo.draw_logo`:
+
+>>> freqs = pd.DataFrame([[0.25, 0.25, 0.25, 0.25],
+...                       [0.7, 0.1, 0.1, 0.1],
+...                       [1.0, 0.0, 0.0, 0.0]],
+...                      index=[1, 2, 3],
+...                      columns=list('ACGT'))
+>>> information_content(freqs).round(3).tolist()
+[0.0, 0.643, 2.0]
+>>> heights = information_heights(freqs)
+>>> heights.round(3)
+      A      C      G      T
+1  0.00  0.000  0.000  0.000
+2  0.45  0.064  0.064  0.064
+3  2.00  0.000  0.000  0.000
+>>> to_long(heights).head(3)
+   site letter  height
+0     1      A     0.0
+1     1      C     0.0
+2     1      G     0.0
+"""
+
+
+import numpy
+
+import pandas as pd
+
+
+def _as_matrix(values):
+    """2-D float array of `values`, and function to wrap result like them."""
+    if isinstance(values, pd.DataFrame):
+        index, columns = values.index, values.columns
+
+        def wrap(result):
+            return pd.DataFrame(result, index=index, columns=columns)
+
+        matrix = values.to_numpy(dtype="float")
+    else:
+
+        def wrap(result):
+            return result
+
+        matrix = numpy.asarray(values, dtype="float")
+    if matrix.ndim != 2:
+        raise ValueError("matrix is not 2-dimensional")
+    return matrix, wrap
+
+
+def _normalize(freqs):
+    """Scale each row of `freqs` to sum to one."""
+    if numpy.any(freqs < 0):
+        raise ValueError("negative frequencies")
+    totals = freqs.sum(axis=1, keepdims=True)
+    if numpy.any(totals == 0):
+        raise ValueError("site with all frequencies zero")
+    return freqs / totals
+
+
+def _plogp(p, q=None):
+    """Array of `p * log2(p / q)` that is zero where `p` is zero."""
+    result = numpy.zeros_like(p)
+    nonzero = p > 0
+    ratio = p if q is None else p / q
+    numpy.log2(ratio, out=result, where=nonzero)
+    return p * result
+
+
+def information_content(freqs, *, nseqs=None):
+    """Shannon information content in bits at each site.
+
+    Args:
+        `freqs` (2-D numpy.ndarray or pandas DataFrame)
+            Frequency of each letter (column) at each site (row). Each row
+            is normalized to sum to one.
+        `nseqs` (`None`, int or array-like)
+            Number of sequences the frequencies are computed from, either
+            for all sites or for each site. If set, the information content
+            is reduced by the small-sample correction
+            `(nletters - 1) / (2 * ln(2) * nseqs)`, and is at least zero.
+
+    Returns:
+        1-D `numpy.ndarray` with the information content of each site,
+        which is `log2(nletters)` minus the entropy of the frequencies.
+
+    >>> information_content([[0.5, 0.5, 0, 0], [1, 0, 0, 0]], nseqs=10).round(3)
+    array([0.784, 1.784])
+
+    """
+    freqs, _ = _as_matrix(freqs)
+    freqs = _normalize(freqs)
+    nletters = freqs.shape[1]
+    entropy = -_plogp(freqs).sum(axis=1)
+    info = numpy.log2(nletters) - entropy
+    if nseqs is not None:
+        correction = (nletters - 1) / (2 * numpy.log(2) * numpy.asarray(nseqs))
+        info = numpy.maximum(info - correction, 0)
+    return info
+
+
+def information_heights(freqs, *, nseqs=None):
+    """Letter heights scaled by the information content of each site.
+
+    Args:
+        `freqs`, `nseqs`
+            Same meaning as for :func:`information_content`.
+
+    Returns:
+        Matrix like `freqs` where each letter has a height of its
+        frequency times the information content of its site, so the stack
+        at each site is as high as the site's information content.
+
+    """
+    freqs, wrap = _as_matrix(freqs)
+    freqs = _normalize(freqs)
+    return wrap(freqs * information_content(freqs, nseqs=nseqs)[:, None])
+
+
+def relative_entropy(freqs, background):
+    """Relative entropy (Kullback-Leibler divergence) in bits at each site.
+
+    Args:
+        `freqs` (2-D numpy.ndarray or pandas DataFrame)
+            Frequency of each letter (column) at each site (row). Each row
+            is normalized to sum to one.
+        `background` (array-like)
+            Background frequency of each letter, either the same for all
+            sites (1-D) or for each site (2-D). Normalized to sum to one.
+
+    Returns:
+        1-D `numpy.ndarray` giving the relative entropy of the frequencies
+        at each site to the background.
+
+    >>> relative_entropy([[0.5, 0.5], [0.25, 0.75]], [0.25, 0.75]).round(3)
+    array([0.208, 0.   ])
+
+    """
+    freqs, _ = _as_matrix(freqs)
+    freqs = _normalize(freqs)
+    background = numpy.broadcast_to(
+        numpy.asarray(background, dtype="float"), freqs.shape
+    )
+    background = _normalize(background)
+    if numpy.any((background == 0) & (freqs > 0)):
+        raise ValueError("letter with zero background frequency")
+    return _plogp(freqs, background).sum(axis=1)
+
+
+def relative_entropy_heights(freqs, background):
+    """Letter heights scaled by the relative entropy of each site.
+
+    Args:
+        `freqs`, `background`
+            Same meaning as for :func:`relative_entropy`.
+
+    Returns:
+        Matrix like `freqs` where each letter has a height of its
+        frequency times the relative entropy of its site.
+
+    """
+    freqs, wrap = _as_matrix(freqs)
+    freqs = _normalize(freqs)
+    return wrap(freqs * relative_entropy(freqs, background)[:, None])
+
+
+def preference_heights(prefs, *, stringency=1):
+    """Letter heights from amino-acid preferences.
+
+    Args:
+        `prefs` (2-D numpy.ndarray or pandas DataFrame)
+            Preference for each letter (column) at each site (row).
+        `stringency` (float)
+            Raise the preferences to this power before normalizing, which
+            sharpens (if > 1) or flattens (if < 1) them.
+
+    Returns:
+        Matrix like `prefs` where the heights at each site sum to one.
+
+    >>> preference_heights([[0.2, 0.2, 0.6], [1, 1, 2]], stringency=2)
+    array([[0.09090909, 0.09090909, 0.81818182],
+           [0.16666667, 0.16666667, 0.66666667]])
+
+    """
+    prefs, wrap = _as_matrix(prefs)
+    return wrap(_normalize(prefs**stringency))
+
+
+def split_positive_negative(values):
+    """Split signed values into positive and negative parts.
+
+    Args:
+        `values` (2-D numpy.ndarray or pandas DataFrame)
+            Values such as differential selection for each letter (column)
+            at each site (row).
+
+    Returns:
+        The 2-tuple `(positive, negative)` of matrices like `values`, with
+        `positive` the values greater than zero (others zero) and `negative`
+        the values less than zero (others zero). NaN values stay NaN in both.
+
+    >>> positive, negative = split_positive_negative([[1.5, -0.5, 0]])
+    >>> positive.tolist(), negative.tolist()
+    ([[1.5, 0.0, 0.0]], [[0.0, -0.5, 0.0]])
+
+    """
+    values, wrap = _as_matrix(values)
+    return (
+        wrap(numpy.where(values < 0, 0.0, values)),
+        wrap(numpy.where(values > 0, 0.0, values)),
+    )
+
+
+def to_long(
+    heights,
+    *,
+    alphabet=None,
+    sites=None,
+    x_col="site",
+    letter_col="letter",
+    letter_height_col="height",
+    dropna=True,
+):
+    """Convert matrix of letter heights to long format for `draw_logo`.
+
+    Args:
+        `heights` (2-D numpy.ndarray or pandas DataFrame)
+            Height of each letter (column) at each site (row). If a data
+            frame, the default `alphabet` is its columns and the default
+            `sites` is its index.
+        `alphabet` (`None` or str or list)
+            Letter of each column of `heights`.
+        `sites` (`None` or array-like)
+            Site of each row of `heights`, by default numbering the rows
+            from 1.
+        `x_col`, `letter_col`, `letter_height_col` (str)
+            Names of the columns of sites, letters and heights in the
+            returned data frame.
+        `dropna` (bool)
+            Drop letters with NaN heights.
+
+    Returns:
+        Data frame with a row for each letter at each site.
+
+    >>> to_long([[1, 2], [float('nan'), 4]], alphabet='AC')
+       site letter  height
+    0     1      A     1.0
+    1     1      C     2.0
+    2     2      C     4.0
+
+    """
+    if isinstance(heights, pd.DataFrame):
+        if alphabet is None:
+            alphabet = heights.columns
+        if sites is None:
+            sites = heights.index
+    values, _ = _as_matrix(heights)
+    nsites, nletters = values.shape
+    if alphabet is None:
+        raise ValueError("`alphabet` not specified")
+    alphabet = numpy.asarray(list(alphabet))
+    if len(alphabet) != nletters:
+        raise ValueError(f"`alphabet` does not have {nletters} letters")
+    if sites is None:
+        sites = numpy.arange(1, nsites + 1)
+    sites = numpy.asarray(sites)
+    if len(sites) != nsites:
+        raise ValueError(f"`sites` does not have {nsites} sites")
+    values = values.ravel()
+    keep = ~numpy.isnan(values) if dropna else slice(None)
+    return pd.DataFrame(
+        {
+            x_col: numpy.repeat(sites, nletters)[keep],
+            letter_col: numpy.tile(alphabet, nsites)[keep],
+            letter_height_col: values[keep],
+        }
+    )
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,603 @@
+"""
+======
+layout
+======
+
+Layout of logo plots computed separately from rendering them.
+"""
+
+
+import copy
+
+import matplotlib.colors
+
+import numpy
+
+import pandas as pd
+
+import dmslogo.cache
+import dmslogo.colorschemes
+import dmslogo.profiling
+import dmslogo.utils
+import dmslogo.validation
+
+
+#: x-axis of logo plots is padded by this many data units on each side
+XPAD = 0.2
+
+
+@dmslogo.cache.lru_cache(maxsize=1024)
+def _to_rgba(color):
+    """RGBA tuple for matplotlib `color`."""
+    return matplotlib.colors.to_rgba(color)
+
+
+class LogoLayout:
+    """Positions, heights, and colors of all letters and sites in a logo plot.
+
+    A :class:`LogoLayout` holds everything derived from the data needed to draw
+    a logo plot as compact `numpy` arrays. It is computed once, and can then
+    be drawn by :func:`dmslogo.logo.draw_logo_layout` (or by other renderers)
+    as many times as needed without processing the data frame again.
+
+    Args:
+        `data` (pandas DataFrame)
+            Holds data to plot.
+        `x_col`, `letter_col`, `letter_height_col`, `xtick_col`, `color_col`,
+        `shade_color_col`, `shade_alpha_col`, `heatmap_overlays`,
+        `colorscheme`, `missing_color`, `addbreaks`, `clip_negative_heights`,
+        `drop_na_letter_heights`, `validate`
+            Same meaning as for :func:`dmslogo.logo.draw_logo`.
+
+    Attributes:
+        `letters` (numpy.ndarray)
+            Each letter, ordered by site and then by height.
+        `letter_site` (numpy.ndarray)
+            Position on the x-axis of the site for each letter.
+        `letter_y0` (numpy.ndarray)
+            y position of the bottom of each letter.
+        `letter_heights` (numpy.ndarray)
+            Height of each letter, negative for letters stacked below zero.
+        `letter_colors` (numpy.ndarray)
+            RGBA color of each letter as array of shape `(nletters, 4)`.
+        `npositions` (int)
+            Number of positions on the x-axis (sites plus breaks).
+        `min_by_site` (numpy.ndarray)
+            Sum of negative letter heights at each x-axis position.
+        `max_by_site` (numpy.ndarray)
+            Sum of positive letter heights at each x-axis position.
+        `sites` (numpy.ndarray)
+            Sorted unique values of `x_col`.
+        `site_positions` (numpy.ndarray)
+            Position on the x-axis of each site in `sites`.
+        `xticks` (numpy.ndarray)
+            Location of x-axis tick for each site in `sites`.
+        `xticklabels` (list)
+            Label for each site in `sites`.
+        `breaks` (numpy.ndarray)
+            Positions on the x-axis that are breaks in the site numbering.
+        `overlay_colors` (dict)
+            Keyed by each of `heatmap_overlays` in order, values are arrays
+            giving overlay color for each site in `sites`.
+        `shade_colors` (`None` or numpy.ndarray)
+            If shading sites, the color for each site in `sites`, or `None`
+            for sites that are not shaded.
+        `shade_alphas` (`None` or numpy.ndarray)
+            If shading sites, the transparency for each site in `sites`.
+        `xtick_col` (str)
+            Column used to label sites, default x-axis label.
+        `letter_height_col` (str)
+            Column with letter heights, default y-axis label.
+
+    The positive letters at each site are stacked upwards from zero in order
+    of increasing height, and the negative letters are stacked below zero with
+    the most negative at the bottom. The layout is computed with vectorized
+    array operations rather than looping over sites or letters:
+
+    >>> data = pd.DataFrame({'site': [1, 1, 1, 2, 4, 4],
+    ...                      'letter': ['A', 'C', 'D', 'A', 'G', 'W'],
+    ...                      'height': [1.0, 0.5, -0.5, 2.0, 1.0, 1.5]})
+    >>> layout = LogoLayout(data,
+    ...                     x_col='site',
+    ...                     letter_col='letter',
+    ...                     letter_height_col='height')
+    >>> layout.letters.tolist()
+    ['D', 'C', 'A', 'A', 'G', 'W']
+    >>> layout.letter_site.tolist()
+    [0, 0, 0, 1, 3, 3]
+    >>> layout.letter_y0.tolist()
+    [-0.5, 0.0, 0.5, 0.0, 0.0, 1.0]
+    >>> layout.npositions
+    4
+    >>> layout.breaks.tolist()
+    [2]
+    >>> layout.xticks.tolist()
+    [0.5, 1.5, 3.5]
+    >>> layout.xticklabels
+    ['1', '2', '4']
+    >>> layout.max_by_site.tolist()
+    [1.5, 2.0, 0.0, 2.5]
+    >>> layout.ylims()
+    (-0.525, 2.625)
+
+    Each heatmap overlay must have a single color at each site:
+
+    >>> data['overlay'] = ['red', 'red', 'red', 'blue', 'red', 'green']
+    >>> LogoLayout(data,
+    ...            x_col='site',
+    ...            letter_col='letter',
+    ...            letter_height_col='height',
+    ...            heatmap_overlays=['overlay'])
+    Traceback (most recent call last):
+      ...
+    ValueError: Overlay not unique per site:
+       site overlay
+    4     4     red
+    5     4   green
+
+    """
+
+    def __init__(
+        self,
+        data,
+        *,
+        x_col,
+        letter_col,
+        letter_height_col,
+        xtick_col=None,
+        color_col=None,
+        shade_color_col=None,
+        shade_alpha_col=None,
+        heatmap_overlays=None,
+        colorscheme=dmslogo.colorschemes.AA_FUNCTIONAL_GROUP,
+        missing_color="gray",
+        addbreaks=True,
+        clip_negative_heights=False,
+        drop_na_letter_heights=True,
+        validate=True,
+    ):
+        """See main class docstring."""
+        phases = dmslogo.profiling._PhaseSequence()
+        phases.enter("validation")
+        if xtick_col is None:
+            xtick_col = x_col
+        self.xtick_col = xtick_col
+        self.letter_height_col = letter_height_col
+
+        # checks on input data
+        if validate:
+            dmslogo.validation.validate_logo_data(
+                data,
+                x_col=x_col,
+                letter_col=letter_col,
+                letter_height_col=letter_height_col,
+                xtick_col=xtick_col,
+                color_col=color_col,
+                drop_na_letter_heights=drop_na_letter_heights,
+            )
+        if drop_na_letter_heights:
+            is_na = data[letter_height_col].isna().to_numpy()
+            if is_na.any():
+                data = data[~is_na]
+            if len(data) == 0:
+                raise ValueError("no data after dropping nan heights")
+        if clip_negative_heights:
+            data = data.assign(
+                **{
+                    letter_height_col: lambda x: numpy.clip(
+                        x[letter_height_col], 0, None
+                    )
+                }
+            )
+
+        phases.enter("layout")
+        self._stack_letters(
+            data,
+            x_col=x_col,
+            letter_col=letter_col,
+            letter_height_col=letter_height_col,
+            xtick_col=xtick_col,
+            color_col=color_col,
+            colorscheme=colorscheme,
+            missing_color=missing_color,
+            addbreaks=addbreaks,
+        )
+
+        # colors of overlays for each site
+        self.overlay_colors = {}
+        if heatmap_overlays:
+            for overlay in heatmap_overlays:
+                if overlay not in data.columns:
+                    raise ValueError(f"`data` lacks `heatmap_overlay` {overlay}")
+            overlay_data = data.groupby(x_col)[list(heatmap_overlays)]
+            nunique = overlay_data.nunique(dropna=False)
+            not_unique = (nunique > 1).to_numpy().any(axis=1)
+            if not_unique.any():
+                raise ValueError(
+                    "Overlay not unique per site:\n"
+                    + str(
+                        data[data[x_col].isin(nunique.index[not_unique])][
+                            [x_col] + list(heatmap_overlays)
+                        ].drop_duplicates()
+                    )
+                )
+            overlay_first = overlay_data.first().reindex(self.sites)
+            for overlay in heatmap_overlays:
+                self.overlay_colors[overlay] = overlay_first[overlay].to_numpy()
+
+        # shading for each site
+        self.shade_colors = self.shade_alphas = None
+        if shade_color_col is not None:
+            if shade_alpha_col is None:
+                raise ValueError("`shade_color_col` without `shade_alpha_col`")
+            if shade_color_col not in data.columns:
+                raise ValueError(f"data lacks `shade_color_col` {shade_color_col}")
+            if shade_alpha_col not in data.columns:
+                raise ValueError(f"data lacks `shade_alpha_col` {shade_alpha_col}")
+            shade_data = data.groupby(x_col)[[shade_color_col, shade_alpha_col]]
+            nunique = shade_data.nunique(dropna=False)
+            for col, name in [(shade_color_col, "color"), (shade_alpha_col, "alpha")]:
+                not_unique = nunique.index[nunique[col].to_numpy() != 1]
+                if len(not_unique):
+                    raise ValueError(
+                        f"not exactly one shade {name} for {not_unique[0]}"
+                    )
+            shade_first = shade_data.first().reindex(self.sites)
+            shade_colors = shade_first[shade_color_col].to_numpy(dtype="object")
+            shade_alphas = shade_first[shade_alpha_col].to_numpy(dtype="float")
+            shaded = pd.notnull(shade_colors) & shade_colors.astype("bool")
+            bad_alpha = shaded & ~((shade_alphas >= 0) & (shade_alphas <= 1))
+            if bad_alpha.any():
+                raise ValueError(
+                    "shade alpha not between 0 and 1 for "
+                    f"{self.sites[numpy.flatnonzero(bad_alpha)[0]]}"
+                )
+            self.shade_colors = numpy.where(shaded, shade_colors, None)
+            self.shade_alphas = numpy.where(shaded, shade_alphas, 0.0)
+        elif shade_alpha_col is not None:
+            raise ValueError("`shade_alpha_col` without `shade_color_col`")
+        phases.close()
+
+    @classmethod
+    def from_matrix(
+        cls,
+        heights,
+        *,
+        alphabet=None,
+        sites=None,
+        site_labels=None,
+        colorscheme=dmslogo.colorschemes.AA_FUNCTIONAL_GROUP,
+        missing_color="gray",
+        addbreaks=True,
+        clip_negative_heights=False,
+    ):
+        """Layout of a logo plot from a matrix of letter heights.
+
+        This is much faster than melting a matrix into the long data frame
+        taken by :class:`LogoLayout`, as the letters are stacked directly
+        from the rows of the matrix.
+
+        Args:
+            `heights` (2-D numpy.ndarray or pandas DataFrame)
+                Height of each letter (column) at each site (row). A NaN
+                height means the letter is not at that site. If a data frame,
+                the default `alphabet` is its columns and the default `sites`
+                is its index.
+            `alphabet` (`None` or str or list)
+                Letter of each column of `heights`.
+            `sites` (`None` or array-like)
+                Integer site number of each row of `heights`, by default
+                numbering the rows from 1.
+            `site_labels` (`None` or array-like)
+                Label for each site, by default the site number.
+            `colorscheme`, `missing_color`, `addbreaks`, `clip_negative_heights`
+                Same meaning as for :func:`dmslogo.logo.draw_logo`.
+
+        Returns:
+            A :class:`LogoLayout` with no heatmap overlays or shading.
+
+        >>> layout = LogoLayout.from_matrix([[1.0, 0.5, -0.5],
+        ...                                  [2.0, numpy.nan, 0.0],
+        ...                                  [1.0, 1.5, numpy.nan]],
+        ...                                 alphabet='ACD',
+        ...                                 sites=[1, 2, 4])
+        >>> layout.letters.tolist()
+        ['D', 'C', 'A', 'D', 'A', 'A', 'C']
+        >>> layout.letter_y0.tolist()
+        [-0.5, 0.0, 0.5, 0.0, 0.0, 0.0, 1.0]
+        >>> layout.xticklabels
+        ['1', '2', '4']
+        >>> layout.breaks.tolist()
+        [2]
+
+        """
+        if isinstance(heights, pd.DataFrame):
+            if alphabet is None:
+                alphabet = heights.columns
+            if sites is None:
+                sites = heights.index
+                xtick_col = heights.index.name or "site"
+            else:
+                xtick_col = "site"
+            heights = heights.to_numpy(dtype="float")
+        else:
+            xtick_col = "site"
+            heights = numpy.asarray(heights, dtype="float")
+        if heights.ndim != 2:
+            raise ValueError("`heights` is not 2-dimensional")
+        nsites, nletters = heights.shape
+        if nsites == 0:
+            raise ValueError("`heights` has no sites")
+        if alphabet is None:
+            raise ValueError("`alphabet` not specified")
+        alphabet = numpy.array(list(alphabet), dtype="object")
+        if len(alphabet) != nletters:
+            raise ValueError(f"`alphabet` does not have {nletters} letters")
+        dmslogo.validation.check_letters(alphabet)
+        if len(set(alphabet)) != nletters:
+            raise ValueError("`alphabet` has duplicate letters")
+        if sites is None:
+            sites = numpy.arange(1, nsites + 1)
+        sites = numpy.asarray(sites)
+        if sites.shape != (nsites,):
+            raise ValueError(f"`sites` does not have {nsites} sites")
+        dmslogo.validation.check_integer_sites(sites)
+        sites = sites.astype("int64")
+        if site_labels is None:
+            site_labels = sites
+        site_labels = numpy.asarray(site_labels, dtype="object")
+        if site_labels.shape != (nsites,):
+            raise ValueError(f"`site_labels` does not have {nsites} labels")
+        if numpy.any(numpy.diff(sites) <= 0):
+            site_order = numpy.argsort(sites, kind="stable")
+            sites = sites[site_order]
+            if numpy.any(numpy.diff(sites) == 0):
+                raise ValueError("`sites` are not unique")
+            heights = heights[site_order]
+            site_labels = site_labels[site_order]
+        if clip_negative_heights:
+            heights = numpy.clip(heights, 0, None)
+
+        # sort letters at each site by height, with any NaN heights last
+        order = numpy.argsort(heights, axis=1, kind="stable")
+        heights = numpy.take_along_axis(heights, order, axis=1)
+        present = ~numpy.isnan(heights)
+        nletters_by_site = present.sum(axis=1)
+        has_letters = nletters_by_site > 0
+        if not has_letters.any():
+            raise ValueError("no data after dropping nan heights")
+
+        # color of each letter in alphabet
+        alphabet_colors = []
+        for letter in alphabet:
+            if letter in colorscheme:
+                alphabet_colors.append(colorscheme[letter])
+            elif missing_color:
+                alphabet_colors.append(missing_color)
+            else:
+                raise ValueError(f"no color for {letter}")
+        alphabet_colors = numpy.array([_to_rgba(color) for color in alphabet_colors])
+
+        layout = cls.__new__(cls)
+        layout.xtick_col = xtick_col
+        layout.letter_height_col = "height"
+        order = order[present]
+        site_starts = layout._stack(
+            numpy.repeat(sites, nletters_by_site),
+            heights[present],
+            alphabet.astype("str")[order],
+            alphabet_colors[order],
+            addbreaks=addbreaks,
+        )
+        layout.xticklabels = [str(label) for label in site_labels[has_letters]]
+        assert len(site_starts) == len(layout.xticklabels)
+        layout.overlay_colors = {}
+        layout.shade_colors = layout.shade_alphas = None
+        return layout
+
+    def _stack_letters(
+        self,
+        data,
+        *,
+        x_col,
+        letter_col,
+        letter_height_col,
+        xtick_col,
+        color_col,
+        colorscheme,
+        missing_color,
+        addbreaks,
+    ):
+        """Set attributes giving positions of letters and sites."""
+        x = data[x_col].to_numpy()
+        heights = data[letter_height_col].to_numpy(dtype="float")
+        order = numpy.lexsort((heights, x))
+        x = x[order]
+        heights = heights[order]
+        letters = data[letter_col].to_numpy()[order]
+
+        if color_col is not None:
+            letter_colors = data[color_col].to_numpy()[order]
+        else:
+            letter_colors = pd.Series(letters).map(colorscheme)
+            no_color = letter_colors.isna().to_numpy()
+            letter_colors = letter_colors.to_numpy(dtype="object")
+            if no_color.any():
+                if missing_color:
+                    letter_colors[no_color] = missing_color
+                else:
+                    raise ValueError(f"no color for {letters[no_color][0]}")
+        color_codes, unique_colors = pd.factorize(letter_colors)
+        unique_colors = numpy.array([_to_rgba(color) for color in unique_colors])
+
+        site_starts = self._stack(
+            x, heights, letters, unique_colors[color_codes], addbreaks=addbreaks
+        )
+        self.xticklabels = [
+            str(label) for label in data[xtick_col].to_numpy()[order][site_starts]
+        ]
+
+    def _stack(self, x, heights, letters, letter_colors, *, addbreaks):
+        """Set attributes giving positions of letters and sites.
+
+        Args:
+            `x`, `heights`, `letters`, `letter_colors` (numpy.ndarray)
+                Site, height, letter, and RGBA color of each letter, sorted
+                by site and then by height.
+            `addbreaks` (bool)
+                Same meaning as for :func:`dmslogo.logo.draw_logo`.
+
+        Returns:
+            Array of the index of the first letter at each site.
+
+        """
+        # index in sorted arrays where each site starts
+        is_site_start = numpy.ones(len(x), dtype="bool")
+        is_site_start[1:] = x[1:] != x[:-1]
+        site_starts = numpy.flatnonzero(is_site_start)
+        sites = x[site_starts]
+        letter_site_num = numpy.cumsum(is_site_start) - 1
+
+        # position of each site on x-axis, leaving a blank position at breaks
+        site_positions = numpy.arange(len(sites))
+        if addbreaks and len(sites) > 1:
+            is_break = numpy.diff(sites) != 1
+            site_positions[1:] += numpy.cumsum(is_break)
+            breaks = site_positions[1:][is_break] - 1
+        else:
+            breaks = numpy.array([], dtype="int")
+        npositions = int(site_positions[-1]) + 1
+
+        min_by_site = numpy.zeros(npositions)
+        min_by_site[site_positions] = numpy.add.reduceat(
+            numpy.minimum(heights, 0), site_starts
+        )
+        max_by_site = numpy.zeros(npositions)
+        max_by_site[site_positions] = numpy.add.reduceat(
+            numpy.maximum(heights, 0), site_starts
+        )
+
+        # letters stacked from bottom of each site by segmented cumulative sum
+        abs_heights = numpy.abs(heights)
+        stacked = numpy.cumsum(abs_heights) - abs_heights
+        letter_site = site_positions[letter_site_num]
+        letter_y0 = (
+            min_by_site[letter_site] + stacked - stacked[site_starts][letter_site_num]
+        )
+
+        self.letters = letters.astype("str")
+        self.letter_site = letter_site
+        self.letter_y0 = letter_y0
+        self.letter_heights = heights
+        self.letter_colors = letter_colors
+        self.npositions = npositions
+        self.min_by_site = min_by_site
+        self.max_by_site = max_by_site
+        self.sites = sites
+        self.site_positions = site_positions
+        self.xticks = site_positions + 0.5
+        self.breaks = breaks
+        return site_starts
+
+    def subset_letters(self, keep):
+        """Layout with only some of the letters.
+
+        Args:
+            `keep` (numpy.ndarray)
+                Boolean mask or indices of the letters to keep.
+
+        Returns:
+            A new :class:`LogoLayout` with only the letters in `keep`. The
+            kept letters stay where they are stacked in this layout, and
+            the sites, axis limits, overlays and shading are unchanged.
+
+        >>> data = pd.DataFrame({'site': [1, 1, 1],
+        ...                      'letter': ['A', 'C', 'D'],
+        ...                      'height': [1.0, 0.25, 0.5]})
+        >>> layout = LogoLayout(data,
+        ...                     x_col='site',
+        ...                     letter_col='letter',
+        ...                     letter_height_col='height')
+        >>> sub = layout.subset_letters(layout.letter_heights > 0.3)
+        >>> sub.letters.tolist(), sub.letter_y0.tolist()
+        (['D', 'A'], [0.25, 0.75])
+        >>> sub.ylims() == layout.ylims()
+        True
+
+        """
+        layout = copy.copy(self)
+        for attr in [
+            "letters",
+            "letter_site",
+            "letter_y0",
+            "letter_heights",
+            "letter_colors",
+        ]:
+            setattr(layout, attr, getattr(self, attr)[keep])
+        return layout
+
+    @property
+    def xlim(self):
+        """2-tuple giving x-axis limits."""
+        return (-XPAD, self.npositions + XPAD)
+
+    def ylims(self, ylim_setter=None, fixed_ymin=None, fixed_ymax=None):
+        """Get y-axis limits.
+
+        Args:
+            `ylim_setter`, `fixed_ymin`, `fixed_ymax`
+                Same meaning as for :func:`dmslogo.logo.draw_logo`.
+
+        Returns:
+            2-tuple `(ymin, ymax)`.
+
+        """
+        if ylim_setter is None:
+            ylim_setter = dmslogo.utils.AxLimSetter()
+        ymin1, ymax1 = ylim_setter.get_lims(self.min_by_site[self.site_positions])
+        ymin2, ymax2 = ylim_setter.get_lims(self.max_by_site[self.site_positions])
+        ymin = float(min(ymin1, ymin2))
+        ymax = float(max(ymax1, ymax2))
+        if fixed_ymin is not None:
+            ymin = fixed_ymin
+        if fixed_ymax is not None:
+            ymax = fixed_ymax
+        return (ymin, ymax)
+
+    def figsize(
+        self,
+        *,
+        widthscale=1,
+        heightscale=1,
+        heatmap_overlay_height=0.15,
+        hide_axis=False,
+        title=None,
+    ):
+        """Get size of figure created by :func:`dmslogo.logo.draw_logo_layout`.
+
+        Args:
+            `widthscale`, `heightscale`, `heatmap_overlay_height`,
+            `hide_axis`, `title`
+                Same meaning as for :func:`dmslogo.logo.draw_logo`.
+
+        Returns:
+            2-tuple `(width, height)` in inches.
+
+        """
+        noverlays = len(self.overlay_colors)
+        return (
+            widthscale * 0.35 * (self.npositions + int(not hide_axis)),
+            heightscale
+            * (
+                2
+                + 0.5 * int(not hide_axis)
+                + 2 * noverlays * heatmap_overlay_height
+                + 0.5 * int(bool(title))
+            ),
+        )
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,159 @@
+"""
+=======
+letters
+=======
+
+Collection of logo letters written compactly to vector formats.
+
+The logo letters drawn by :func:`dmslogo.logo.draw_logo` are a
+:class:`LetterCollection`. It draws them as a
+`matplotlib.collections.PathCollection`, except when a figure is saved as
+SVG (see :mod:`dmslogo.svg`) or PDF (see :mod:`dmslogo.pdf`), in which
+case the outline of each glyph is written only once and each letter just
+places it with an affine transform.
+"""
+
+
+import matplotlib
+import matplotlib.artist
+import matplotlib.backends.backend_pdf
+import matplotlib.backends.backend_svg
+import matplotlib.collections
+
+import numpy
+
+import dmslogo.pdf
+import dmslogo.svg
+
+
+class LetterCollection(matplotlib.collections.PathCollection):
+    """Collection of logo letters each placed by an affine transform.
+
+    Args:
+        `paths` (list)
+            Paths of the letters for drawing as a `PathCollection`,
+            typically with all letters of the same glyph and color
+            combined in one path.
+        `glyphs` (list)
+            Outline of each glyph as a `matplotlib.path.Path` in em units,
+            with the origin at the left of the baseline.
+        `glyph_letters` (list)
+            Letter (str) of each glyph.
+        `fontproperties` (matplotlib.font_manager.FontProperties)
+            Font of the glyphs.
+        `glyph_codes` (numpy.ndarray)
+            Index in `glyphs` of each letter.
+        `xscale` (float)
+            Width in data units of one em of a glyph.
+        `xoffsets`, `yscales`, `yoffsets` (numpy.ndarray)
+            A point `(x, y)` on the glyph of each letter is at
+            `(x * xscale + xoffset, y * yscale + yoffset)` in data units.
+        `color_codes` (numpy.ndarray)
+            Index in `colors` of the color of each letter.
+        `colors` (numpy.ndarray)
+            Array of RGBA colors.
+        `**kwargs`
+            Keyword arguments for `PathCollection`.
+
+    The arguments other than `paths` and `kwargs` are stored as attributes
+    of the same name.
+
+    """
+
+    def __init__(
+        self,
+        paths,
+        *,
+        glyphs,
+        glyph_letters,
+        fontproperties,
+        glyph_codes,
+        xscale,
+        xoffsets,
+        yscales,
+        yoffsets,
+        color_codes,
+        colors,
+        **kwargs,
+    ):
+        """See main class docstring."""
+        super().__init__(paths, **kwargs)
+        self.glyphs = glyphs
+        self.glyph_letters = glyph_letters
+        self.fontproperties = fontproperties
+        self.glyph_codes = glyph_codes
+        self.xscale = xscale
+        self.xoffsets = xoffsets
+        self.yscales = yscales
+        self.yoffsets = yoffsets
+        self.color_codes = color_codes
+        self.colors = colors
+
+    def letter_matrices(self, transform):
+        """Affine transforms from glyph to output coordinates.
+
+        Args:
+            `transform` (matplotlib.transforms.Transform)
+                Affine transform from data to output coordinates.
+
+        Returns:
+            Array of shape `(nletters, 6)` with each row the affine
+            transform `(a, b, c, d, e, f)` that takes a point `(x, y)` in em
+            units on the glyph of that letter to `(a * x + c * y + e,
+            b * x + d * y + f)` in output coordinates.
+
+        """
+        m = transform.get_matrix()
+        n = len(self.glyph_codes)
+        return numpy.column_stack(
+            [
+                numpy.full(n, m[0, 0] * self.xscale),
+                numpy.full(n, m[1, 0] * self.xscale),
+                m[0, 1] * self.yscales,
+                m[1, 1] * self.yscales,
+                m[0, 0] * self.xoffsets + m[0, 1] * self.yoffsets + m[0, 2],
+                m[1, 0] * self.xoffsets + m[1, 1] * self.yoffsets + m[1, 2],
+            ]
+        )
+
+    def color_groups(self):
+        """Indices of letters with each color.
+
+        Returns:
+            List of 2-tuples `(rgba, indices)` giving each color and the
+            array of indices of letters with that color.
+
+        """
+        order = numpy.argsort(self.color_codes, kind="stable")
+        starts = numpy.flatnonzero(
+            numpy.diff(self.color_codes[order], prepend=-1)
+        ).tolist()
+        return [
+            (self.colors[self.color_codes[order[start]]], order[start:end])
+            for start, end in zip(starts, starts[1:] + [len(order)])
+        ]
+
+    @matplotlib.artist.allow_rasterization
+    def draw(self, renderer):
+        """Draw letters, writing SVG and PDF directly."""
+        # when saving as SVG or PDF, `renderer` is a `MixedModeRenderer`
+        vector_renderer = getattr(renderer, "_renderer", renderer)
+        transform = self.get_transform()
+        if self.get_visible() and transform.is_affine:
+            if isinstance(
+                vector_renderer, matplotlib.backends.backend_svg.RendererSVG
+            ) and dmslogo.svg._can_write_letters_svg(vector_renderer):
+                writer = dmslogo.svg._write_letters_svg
+            elif isinstance(
+                vector_renderer, matplotlib.backends.backend_pdf.RendererPdf
+            ) and dmslogo.pdf._can_write_letters_pdf(vector_renderer, self):
+                writer = dmslogo.pdf._write_letters_pdf
+            else:
+                writer = None
+            if writer is not None:
+                renderer.open_group(self.__class__.__name__, self.get_gid())
+                writer(vector_renderer, self, transform)
+                renderer.close_group(self.__class__.__name__)
+                self.stale = False
+                return
+        super().draw(renderer)
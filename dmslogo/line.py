@@ -13,7 +13,9 @@ import matplotlib.ticker
 import numpy
 
 import dmslogo.colorschemes
+import dmslogo.profiling
 import dmslogo.utils
+import dmslogo.validation
 
 
 def data_units_from_linewidth(linewidth, ax, reference):
@@ -51,6 +53,7 @@ def data_units_from_linewidth(linewidth, ax, reference):
     return linewidth / (length / value_range)
 
 
+@dmslogo.utils._close_new_figures_on_error
 def draw_line(
     data,
     *,
@@ -74,6 +77,8 @@ def draw_line(
     ylim_setter=None,
     fixed_ymin=None,
     fixed_ymax=None,
+    dry_run=False,
+    validate=True,
 ):
     """Draw line plot.
 
@@ -129,10 +134,26 @@ def draw_line(
             If not `None`, then fixed y-axis minimum.
         `fixed_ymax` (`None` or float)
             If not `None`, then fixed y-axis maximum.
+        `dry_run` (bool)
+            Do not create a figure or draw anything, just return the layout
+            quantities described below. Useful for sizing plots.
+        `validate` (bool)
+            Check that `data` can be plotted. Set to `False` to skip the
+            checks if you have already checked `data` with
+            :func:`dmslogo.validation.validate_line_data`, such as when
+            plotting the same data many times. Then `data` is also not
+            copied, de-duplicated or sorted unless it has more than one row
+            per site or unsorted sites, in which case the first row of each
+            site is kept and sorted.
 
     Returns:
         The 2-tuple `(fig, ax)` giving the figure and axis.
 
+        If `dry_run` is `True`, instead returns a dict keyed by: `width`
+        (width of figure that would be created), `xticks` and `xticklabels`
+        (x-axis ticks and labels, empty if `hide_axis`), and `ylim` (2-tuple
+        of y-axis limits).
+
     """
     # set default values of arguments that can be None
     if xtick_col is None:
@@ -142,36 +163,42 @@ def draw_line(
     if ylabel is None:
         ylabel = height_col
 
-    cols = list({x_col, xtick_col, height_col})
+    phases = dmslogo.profiling._PhaseSequence()
+    phases.enter("validation")
+    if validate:
+        dmslogo.validation.validate_line_data(
+            data,
+            x_col=x_col,
+            height_col=height_col,
+            height_col2=height_col2,
+            xtick_col=xtick_col,
+            show_col=show_col,
+        )
+    cols = list(dict.fromkeys([x_col, xtick_col, height_col]))
     if height_col2 is not None:
         cols.append(height_col2)
     if show_col:
         cols.append(show_col)
-        if not data[show_col].dtype == bool:
-            raise ValueError("`show_col` is not bool")
-    for col in cols:
-        if col not in data.columns:
-            raise ValueError(f"`data` lacks column {col}")
-
-    data = data[cols].drop_duplicates().sort_values(x_col)
 
-    if any(data[x_col] != data[x_col].astype(int)):
-        raise ValueError("`x_col` does not have integer values")
+    if validate:
+        data = data[cols].drop_duplicates().sort_values(x_col)
+    else:
+        # checked data has the same values of `cols` in all rows of a site,
+        # so keep its first row, and only copy and sort the data if needed
+        sites = data[x_col]
+        if not sites.is_unique:
+            data = data[~sites.duplicated().to_numpy()]
+        if not data[x_col].is_monotonic_increasing:
+            data = data.sort_values(x_col)
 
     xmin = data[x_col].min()
     xmax = data[x_col].max()
     xlen = xmax - xmin + 1
-    if (xlen != data[x_col].nunique()) or any(
-        list(range(xmin, xmax + 1)) != data[x_col].unique()
-    ):
-        raise ValueError("`x_col` not sequential unbroken integers")
-
-    if len(data[x_col]) != len(data[x_col].unique()):
-        raise ValueError(f"not unique mapping of `x_col` to other cols {cols}")
 
     assert len(data) == xlen
 
     # set y-limits
+    phases.enter("layout")
     if ylim_setter is None:
         ylim_setter = dmslogo.utils.AxLimSetter()
     ymin, ymax = ylim_setter.get_lims(data[height_col])
@@ -195,21 +222,41 @@ def draw_line(
             raise ValueError("`fixed_ymin` greater then min of data")
         ymin = fixed_ymin
 
+    if not hide_axis:
+        xbreaks, xlabels = dmslogo.utils.breaksAndLabels(
+            data[x_col].tolist(), data[xtick_col].tolist(), max(4, xlen // 50)
+        )
+    else:
+        xbreaks = xlabels = []
+
+    # width per site ranges from 0.02 for xlen <= 100 to
+    # 0.07 for xlen > 700
+    xwidth = 0.02 - 0.013 * (min(700, max(100, xlen)) - 100) / (700 - 100)
+    figsize = (
+        widthscale * xwidth * xlen + 0.5 * int(not hide_axis),
+        heightscale * (2 + 0.5 * int(not hide_axis) + 0.5 * int(bool(title))),
+    )
+
+    phases.close()
+
+    if dry_run:
+        return {
+            "width": figsize[0],
+            "xticks": list(xbreaks),
+            "xticklabels": list(xlabels),
+            "ylim": (ymin, ymax),
+        }
+
     # setup axis for plotting
     if not ax:
-        fig, ax = plt.subplots()
-        # width per site ranges from 0.02 for xlen <= 100 to
-        # 0.07 for xlen > 700
-        xwidth = 0.02 - 0.013 * (min(700, max(100, xlen)) - 100) / (700 - 100)
-        fig.set_size_inches(
-            (
-                widthscale * xwidth * xlen + 0.5 * int(not hide_axis),
-                heightscale * (2 + 0.5 * int(not hide_axis) + 0.5 * int(bool(title))),
-            )
-        )
+        fig, ax = dmslogo.utils.subplots()
+        fig.set_size_inches(figsize)
+        nartists = 0
     else:
         fig = ax.get_figure()
+        nartists = dmslogo.profiling._artist_count(fig)
 
+    phases.enter("axes")
     if title:
         ax.set_title(title, fontsize=17 * axisfontscale)
 
@@ -217,9 +264,6 @@ def draw_line(
     ax.set_ylim(ymin, ymax)
 
     if not hide_axis:
-        xbreaks, xlabels = dmslogo.utils.breaksAndLabels(
-            data[x_col].tolist(), data[xtick_col].tolist(), max(4, xlen // 50)
-        )
         ax.set_xticks(xbreaks)
         ax.tick_params(length=5, width=1)
         ax.set_xticklabels(xlabels, rotation=90, ha="center", va="top")
@@ -231,6 +275,7 @@ def draw_line(
     else:
         ax.axis("off")
 
+    phases.enter("lines")
     xdata = data[x_col].tolist()
     ydata = data[height_col].tolist()
     # plot with 0.5 before / after last points so steps full length
@@ -252,6 +297,7 @@ def draw_line(
             linewidth=linewidth,
         )
 
+    phases.enter("decorations")
     if show_col and show_color is not None:
         lw_to_xdata = data_units_from_linewidth(linewidth, ax, "x")
         lw_to_ydata = data_units_from_linewidth(linewidth, ax, "y")
@@ -265,6 +311,8 @@ def draw_line(
                     facecolor=show_color,
                 )
             )
+    phases.close()
+    dmslogo.profiling._count_artists_created(fig, nartists)
 
     return fig, ax
 
@@ -7,16 +7,56 @@ Core logo-drawing functions of `dmslogo`.
 
 Some of this code is borrowed and modified from
 `pyseqlogo <https://github.com/saketkc/pyseqlogo>`_.
+
+Font metrics needed to scale the letters are computed from the glyph
+outlines once per font and stored in an on-disk cache shared by all
+processes. The cache is in ``$XDG_CACHE_HOME/dmslogo`` (by default
+``~/.cache/dmslogo``); set the environment variable ``DMSLOGO_CACHEDIR``
+to use another directory. Within a process, font properties, metrics and
+glyph outlines are held in the bounded caches of :mod:`dmslogo.cache`.
+
+The plotting functions can be called from several threads at once, such as
+from a `concurrent.futures.ThreadPoolExecutor`, as long as each thread draws
+on its own figure. The font and metric caches are protected by locks, and
+figures created outside the main thread do not use `pyplot` (see
+:func:`dmslogo.utils.pyplot_free`). For instance, here 200 logos are drawn
+in 16 threads, and each is identical to the same logo drawn in one thread:
+
+>>> import concurrent.futures
+>>> data = pd.DataFrame({'site': [1, 1, 2, 3, 3],
+...                      'letter': ['A', 'C', 'G', 'W', 'Y'],
+...                      'height': [1.0, 0.5, 2.0, 0.4, 1.2]})
+>>> def render(i):
+...     with dmslogo.utils.pyplot_free():
+...         fig, _ = draw_logo(data.assign(height=data['height'] * (1 + i % 5)),
+...                            x_col='site',
+...                            letter_col='letter',
+...                            letter_height_col='height')
+...         fig.set_dpi(20)
+...         fig.canvas.draw()
+...         return numpy.asarray(fig.canvas.buffer_rgba()).copy()
+>>> expected = [render(i) for i in range(5)]
+>>> with concurrent.futures.ThreadPoolExecutor(16) as executor:
+...     images = list(executor.map(render, range(200)))
+>>> all((image == expected[i % 5]).all() for i, image in enumerate(images))
+True
 """
 
 
 import glob
+import json
 import os
+import string
+import tempfile
+import threading
 import warnings
 
+import matplotlib
+import matplotlib.collections
 import matplotlib.font_manager
-import matplotlib.patheffects
+import matplotlib.path
 import matplotlib.pyplot as plt
+import matplotlib.textpath
 import matplotlib.ticker
 import matplotlib.transforms
 
@@ -26,74 +66,73 @@ import pandas as pd
 
 import pkg_resources
 
+import dmslogo.cache
 import dmslogo.colorschemes
+import dmslogo.layout
+import dmslogo.letters
+import dmslogo.profiling
+import dmslogo.raster
 import dmslogo.utils
 
 
 # default font
 _DEFAULT_FONT = "DejaVuSansMonoBold_SeqLogo"
 
-# add fonts to font manager
+# add bundled fonts to font manager
 _FONT_PATH = pkg_resources.resource_filename("dmslogo", "ttf_fonts/")
 if not os.path.isdir(_FONT_PATH):
     raise RuntimeError(f"Cannot find font directory {_FONT_PATH}")
 
 for _fontfile in matplotlib.font_manager.findSystemFonts(_FONT_PATH):
     matplotlib.font_manager.fontManager.addfont(_fontfile)
-for _fontfile in matplotlib.font_manager.findSystemFonts(None):
-    try:
-        matplotlib.font_manager.fontManager.addfont(_fontfile)
-    except TypeError:
-        warnings.warn(f"Cannot load font {_fontfile}", RuntimeWarning)
-    except RuntimeError:
-        # problem with loading emoji fonts; solution here is just to
-        # skip any fonts that cause problems
-        pass
 del _fontfile
 
 _fontlist = {f.name for f in matplotlib.font_manager.fontManager.ttflist}
 if _DEFAULT_FONT not in _fontlist:
     raise RuntimeError(f"Could not find default font {_DEFAULT_FONT}")
+_BUNDLED_FONTS = set()
 for _fontfile in glob.glob(f"{_FONT_PATH}/*.ttf"):
     _font = os.path.splitext(os.path.basename(_fontfile))[0]
     if _font not in _fontlist:
         raise RuntimeError(f"Could not find font {_font} in file {_fontfile}")
+    _BUNDLED_FONTS.add(_font)
 
+# system fonts are only scanned the first time a non-bundled font is used
+_system_fonts_added = False
+# held while adding system fonts so they are only added by one thread
+_system_fonts_lock = threading.Lock()
 
-class Scale(matplotlib.patheffects.RendererBase):
-    """Scale letters using affine transformation.
-
-    From here: https://www.python-forum.de/viewtopic.php?t=30856
-    """
-
-    def __init__(self, sx, sy=None):
-        """See main class docstring."""
-        self._sx = sx
-        self._sy = sy
 
-    def draw_path(self, renderer, gc, tpath, affine, rgbFace):
-        """Draw the letters."""
-        affine = matplotlib.transforms.Affine2D().scale(self._sx, self._sy) + affine
-        renderer.draw_path(gc, tpath, affine, rgbFace)
+def _add_system_fonts():
+    """Add all system fonts to the font manager."""
+    for fontfile in matplotlib.font_manager.findSystemFonts(None):
+        try:
+            matplotlib.font_manager.fontManager.addfont(fontfile)
+        except TypeError:
+            warnings.warn(f"Cannot load font {fontfile}", RuntimeWarning)
+        except RuntimeError:
+            # problem with loading emoji fonts; solution here is just to
+            # skip any fonts that cause problems
+            pass
 
 
-class Memoize:
-    """Memoize function from https://stackoverflow.com/a/1988826"""
+def _ensure_font(fontfamily):
+    """Make sure `fontfamily` can be resolved by the font manager.
 
-    def __init__(self, f):
-        """See main class docstring."""
-        self.f = f
-        self.memo = {}
+    Only the fonts bundled with `dmslogo` are registered at import. The
+    (potentially slow) scan of system fonts is done the first time any
+    other font family is requested.
 
-    def __call__(self, *args):
-        """Call class."""
-        if args not in self.memo:
-            self.memo[args] = self.f(*args)
-        # Warning: You may wish to do a deepcopy here if returning objects
-        return self.memo[args]
+    """
+    global _system_fonts_added
+    if (fontfamily not in _BUNDLED_FONTS) and not _system_fonts_added:
+        with _system_fonts_lock:
+            if not _system_fonts_added:
+                _add_system_fonts()
+                _system_fonts_added = True
 
 
-@Memoize
+@dmslogo.cache.lru_cache(maxsize=64)
 def _setup_font(fontfamily, fontsize):
     """Get `FontProperties` for `fontfamily` and `fontsize`."""
     font = matplotlib.font_manager.FontProperties(
@@ -102,58 +141,284 @@ def _setup_font(fontfamily, fontsize):
     return font
 
 
-@Memoize
-def _frac_above_baseline(font):
-    """Fraction of font height that is above baseline.
+# version of on-disk font metrics cache, increment if format changes
+_METRICS_CACHE_VERSION = 2
+
+
+def _cache_dir():
+    """Directory of the on-disk cache shared across processes."""
+    cachedir = os.environ.get("DMSLOGO_CACHEDIR")
+    if not cachedir:
+        cachedir = os.path.join(
+            os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"),
+            "dmslogo",
+        )
+    return cachedir
+
+
+def _metrics_cache_file():
+    """Path to JSON file with cached font metrics."""
+    return os.path.join(_cache_dir(), f"font_metrics_v{_METRICS_CACHE_VERSION}.json")
+
+
+def _read_metrics_cache():
+    """Dict of cached font metrics, empty if no cache can be read."""
+    try:
+        with open(_metrics_cache_file()) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return cache
+
+
+def _write_metrics_cache(key, value):
+    """Add `key` with `value` to the on-disk font metrics cache.
+
+    The cache is re-read before writing so entries added by other processes
+    are kept, and it is replaced atomically so concurrent readers never see a
+    partially written file. Failures to write are ignored, as the cache only
+    saves time.
+
+    """
+    cachefile = _metrics_cache_file()
+    cache = _read_metrics_cache()
+    cache[key] = value
+    try:
+        os.makedirs(os.path.dirname(cachefile), exist_ok=True)
+        fd, tmpfile = tempfile.mkstemp(dir=os.path.dirname(cachefile), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmpfile, cachefile)
+        except BaseException:
+            os.remove(tmpfile)
+            raise
+    except OSError:
+        pass
+
+
+def _font_metrics_key(font, metric):
+    """Key for `metric` of `font` in the on-disk font metrics cache.
+
+    The key identifies the font file by its path, modification time and size,
+    and includes the `matplotlib` version.
+
+    """
+    fontfile = matplotlib.font_manager.findfont(font)
+    stat = os.stat(fontfile)
+    return json.dumps(
+        [
+            metric,
+            os.path.abspath(fontfile),
+            stat.st_mtime_ns,
+            stat.st_size,
+            matplotlib.__version__,
+        ]
+    )
+
+
+# letters for which extents are computed together and cached for each font
+_CACHED_EXTENT_LETTERS = (
+    string.ascii_uppercase + string.ascii_lowercase + string.digits + string.punctuation
+)
+
+
+@dmslogo.cache.lru_cache(maxsize=16)
+def _font_letter_extents(fontfamily):
+    """Vertical extents of common letters in `fontfamily`.
 
     Args:
-        `font` (FontProperties)
-            Font for which we are computing fraction.
+        `fontfamily` (str)
+            Name of font.
+
+    Returns:
+        Dict keyed by each letter in `_CACHED_EXTENT_LETTERS` with values
+        giving the vertical extent as computed by :func:`_letter_extent`.
+
+    The values are read from the on-disk font metrics cache if there,
+    otherwise they are computed and added to the cache.
 
     """
-    fig, ax = plt.subplots()
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
+    key = _font_metrics_key(_setup_font(fontfamily, 1), "letter_extents")
+    extents = _read_metrics_cache().get(key)
+    if extents is None:
+        extents = {
+            letter: _glyph_extent(letter, fontfamily)
+            for letter in _CACHED_EXTENT_LETTERS
+        }
+        _write_metrics_cache(key, extents)
+    return extents
 
-    txt_baseline = ax.text(
-        0, 0, "A", fontproperties=font, va="baseline", bbox={"pad": 0}
+
+def _letter_extent(letter, fontfamily):
+    """Vertical extent of glyph outline of `letter` in `fontfamily`.
+
+    Returns:
+        The 2-tuple `(ymin, ymax)` giving the lowest and highest point
+        of the glyph in em units relative to the baseline. Letters like
+        Q and J in many fonts have `ymin` < 0 as they extend below the
+        baseline.
+
+    """
+    extents = _font_letter_extents(fontfamily)
+    if letter in extents:
+        return tuple(extents[letter])
+    return _glyph_extent(letter, fontfamily)
+
+
+@dmslogo.cache.lru_cache(maxsize=1024)
+def _glyph_extent(letter, fontfamily):
+    """Compute value returned by :func:`_letter_extent` from glyph outline."""
+    glyph = _glyph_path(letter, fontfamily)
+    if not len(glyph.vertices):
+        # glyph with no outline (e.g., a space), treat as full em height
+        return (0.0, 1.0)
+    extent = glyph.get_extents()
+    return (float(extent.y0), float(extent.y1))
+
+
+@dmslogo.cache.lru_cache(maxsize=1024)
+def _glyph_path(letter, fontfamily):
+    """Outline of `letter` in `fontfamily` as a `Path` in em units.
+
+    The left edge of the glyph's advance box is at x of 0 and the baseline
+    is at y of 0, exactly as when the letter is drawn by `ax.text` with
+    `ha="left"` and `va="baseline"`.
+
+    """
+    font = _setup_font(fontfamily, 1)
+    return matplotlib.textpath.TextPath((0, 0), letter, size=1, prop=font)
+
+
+def _letter_transforms(
+    layout,
+    ylim,
+    *,
+    fontfamily,
+    fontaspect,
+    letterpad,
+    letterheightscale,
+):
+    """Vertical placement of glyph outlines of logo letters.
+
+    Args:
+        `layout` (:class:`dmslogo.layout.LogoLayout`)
+            Layout of logo.
+        `ylim` (2-tuple)
+            y-axis limits of the plot.
+        `fontfamily`, `fontaspect`, `letterpad`, `letterheightscale`
+            Same meaning as for :func:`draw_logo`.
+
+    Returns:
+        The 4-tuple `(unique_letters, letter_codes, yscale, yoffset)`.
+        `unique_letters` are the different letters, `letter_codes` gives the
+        index in `unique_letters` of each letter in `layout.letters`, and a
+        point at `y` in em units on the glyph of each letter is at
+        `y * yscale + yoffset` in data coordinates. Horizontally, one em of
+        glyph width spans `1 / fontaspect` sites starting at the letter's
+        site in `layout.letter_site`.
+
+    """
+    letter_y0 = layout.letter_y0
+    letter_heights = layout.letter_heights
+    heights = numpy.abs(letter_heights)
+    max_stack_height = numpy.bincount(layout.letter_site, weights=heights).max()
+
+    ymin, ymax = ylim
+    yextent = ymax - ymin
+    if max_stack_height > yextent:
+        raise ValueError("`max_stack_height` exceeds `yextent`")
+    if ymin > 0:
+        raise ValueError("`ymin` > 0")
+    if letter_y0.min() < ymin:
+        raise ValueError("`ymin` exceeds smallest `ystarts`")
+
+    letterpadheight = yextent * letterpad
+    _ensure_font(fontfamily)
+
+    adj_heights = letterheightscale * heights
+    padding = numpy.minimum(heights / 2, letterpadheight)
+    ypad = numpy.where(letter_heights >= 0, padding + heights - adj_heights, 0)
+
+    # The glyph outline is stretched vertically to exactly fill the letter
+    # height (including any part of the glyph below the baseline).
+    letter_codes, unique_letters = pd.factorize(layout.letters)
+    glyph_extents = numpy.array(
+        [_letter_extent(letter, fontfamily) for letter in unique_letters]
     )
-    txt_bottom = ax.text(0, 0, "A", fontproperties=font, va="bottom", bbox={"pad": 0})
+    glyph_ymin = glyph_extents[letter_codes, 0]
+    glyph_ymax = glyph_extents[letter_codes, 1]
+    yscale = (adj_heights - padding) / (glyph_ymax - glyph_ymin)
+    yoffset = letter_y0 + ypad - glyph_ymin * yscale
+    return unique_letters, letter_codes, yscale, yoffset
 
-    fig.canvas.draw()
-    bbox_baseline = txt_baseline.get_window_extent()
-    bbox_bottom = txt_bottom.get_window_extent()
 
-    height_baseline = bbox_baseline.y1 - bbox_baseline.y0
-    height_bottom = bbox_bottom.y1 - bbox_bottom.y0
-    assert numpy.allclose(height_baseline, height_bottom)
-    frac = (bbox_baseline.y1 - bbox_bottom.y0) / height_bottom
+def _visible_letters(layout, ax, min_visible_height):
+    """Layout without letters too small to see.
 
-    plt.close(fig)
+    Args:
+        `layout` (:class:`dmslogo.layout.LogoLayout`)
+            Layout of logo.
+        `ax` (matplotlib.axes.Axes)
+            Axis of logo, with y-limits and size already set.
+        `min_visible_height` (`None`, float, or str)
+            Same meaning as for :func:`draw_logo`.
+
+    Returns:
+        `layout` with only the letters to draw.
+
+    >>> data = pd.DataFrame({'site': [1, 1, 1],
+    ...                      'letter': ['A', 'C', 'D'],
+    ...                      'height': [1.0, 0.001, 0.0]})
+    >>> layout = dmslogo.layout.LogoLayout(data,
+    ...                                    x_col='site',
+    ...                                    letter_col='letter',
+    ...                                    letter_height_col='height')
+    >>> with dmslogo.utils.pyplot_free():
+    ...     fig, ax = draw_logo_layout(layout)
+    ...     [_visible_letters(layout, ax, h).letters.tolist()
+    ...      for h in [None, 0, 0.01, '1px']]
+    [['D', 'C', 'A'], ['C', 'A'], ['A'], ['A']]
 
-    return frac
+    """
+    if min_visible_height is None:
+        return layout
+    if isinstance(min_visible_height, str):
+        if not min_visible_height.endswith("px"):
+            raise ValueError(f"invalid `min_visible_height` {min_visible_height}")
+        ymin, ymax = ax.get_ylim()
+        min_visible_height = (
+            float(min_visible_height[: -len("px")])
+            * abs(ymax - ymin)
+            / ax.get_window_extent().height
+        )
+    heights = numpy.abs(layout.letter_heights)
+    keep = (heights > 0) & (heights >= min_visible_height)
+    if keep.all():
+        return layout
+    dmslogo.profiling.count("letters_culled", len(keep) - keep.sum())
+    return layout.subset_letters(keep)
 
 
 def _draw_text_data_coord(
-    height_matrix,
-    ystarts,
+    layout,
     ax,
     fontfamily,
     fontaspect,
     letterpad,
     letterheightscale,
-    xpad,
+    min_visible_height=None,
 ):
     """Draws logo letters.
 
     Args:
-        `height_matrix` (list of lists)
-            Gives letter heights. In the main list, there is a list
-            for each site, with the entries being 3-tuples giving
-            the letter, its height, its color, and 'pad_below' or
-            'pad_above' indicating where vertical padding is added.
-        `ystarts` (list)
-            Gives y position of bottom of first letter for each site.
+        `layout` (:class:`dmslogo.layout.LogoLayout`)
+            Gives position, identity, bottom, height, and color of each
+            letter. Vertical padding is added below letters with positive
+            heights and above letters with negative heights.
         `ax` (matplotlib Axes)
             Axis on which we draw logo letters.
         `fontfamily` (str)
@@ -164,76 +429,83 @@ def _draw_text_data_coord(
             Add this much vertical padding between letters.
         `letterheightscale` (float)
             Scale height of letters by this much.
-        `xpad` (float)
-            x-axis is padded by this many data units on each side.
+        `min_visible_height` (`None`, float, or str)
+            Same meaning as for :func:`draw_logo`.
 
-    """
-    fig = ax.get_figure()
-    # get bbox in **inches**
-    bbox = ax.get_window_extent().transformed(fig.dpi_scale_trans.inverted())
-    width = bbox.width * len(height_matrix) / (2 * xpad + len(height_matrix))
-    height = bbox.height
-
-    max_stack_height = max(sum(abs(tup[1]) for tup in row) for row in height_matrix)
-
-    if len(ystarts) != len(height_matrix):
-        raise ValueError(
-            "`ystarts` and `height_matrix` different lengths\n"
-            f"ystarts={ystarts}\nheight_matrix={height_matrix}"
-        )
+    The letters are drawn as a single :class:`dmslogo.letters.LetterCollection`.
+    Each letter's cached glyph outline is placed by its own affine transform,
+    and all letters with the same glyph and color are combined into one
+    compound path. In SVG and PDF, each glyph outline is instead written only
+    once.
 
-    ymin, ymax = ax.get_ylim()
-    yextent = ymax - ymin
-    if max_stack_height > yextent:
-        raise ValueError("`max_stack_height` exceeds `yextent`")
-    if ymin > 0:
-        raise ValueError("`ymin` > 0")
-    if min(ystarts) < ymin:
-        raise ValueError("`ymin` exceeds smallest `ystarts`")
-
-    letterpadheight = yextent * letterpad
-    fontsize = 72
-    font = _setup_font(fontfamily, fontsize)
-    frac_above_baseline = _frac_above_baseline(font)
-
-    fontwidthscale = width / (fontaspect * len(height_matrix))
-
-    for xindex, (xcol, ystart) in enumerate(zip(height_matrix, ystarts)):
-        ypos = ystart
-        for letter, letterheight, lettercolor, pad_loc in xcol:
-            adj_letterheight = letterheightscale * letterheight
-            padding = min(letterheight / 2, letterpadheight)
-            if pad_loc == "pad_below":
-                ypad = padding + letterheight - adj_letterheight
-            elif pad_loc == "pad_above":
-                ypad = 0
-            else:
-                raise ValueError(f"invalid `pad_loc` {pad_loc}")
-
-            txt = ax.text(
-                xindex,
-                ypos + ypad,
-                letter,
-                fontsize=fontsize,
-                color=lettercolor,
-                ha="left",
-                va="baseline",
-                fontproperties=font,
-                bbox={"pad": 0, "edgecolor": "none", "facecolor": "none"},
-            )
+    """
+    layout = _visible_letters(layout, ax, min_visible_height)
+    if not len(layout.letters):
+        return
+    letter_site = layout.letter_site
+    xscale = 1 / fontaspect
+    unique_letters, letter_codes, yscale, yoffset = _letter_transforms(
+        layout,
+        ax.get_ylim(),
+        fontfamily=fontfamily,
+        fontaspect=fontaspect,
+        letterpad=letterpad,
+        letterheightscale=letterheightscale,
+    )
 
-            scaled_height = adj_letterheight / frac_above_baseline
-            scaled_padding = padding / frac_above_baseline
-            txt.set_path_effects(
-                [
-                    Scale(
-                        fontwidthscale,
-                        ((scaled_height - scaled_padding) * height / yextent),
-                    )
-                ]
+    # group letters with same glyph and color
+    color_codes, unique_colors = pd.factorize(
+        numpy.ascontiguousarray(numpy.round(layout.letter_colors * 255), dtype="uint8")
+        .view("uint32")
+        .ravel()
+    )
+    group_codes = letter_codes * len(unique_colors) + color_codes
+    order = numpy.argsort(group_codes, kind="stable")
+    group_starts = numpy.flatnonzero(
+        numpy.diff(group_codes[order], prepend=-1)
+    ).tolist()
+
+    paths = []
+    colors = []
+    for start, end in zip(group_starts, group_starts[1:] + [len(order)]):
+        idx = order[start:end]
+        glyph = _glyph_path(unique_letters[letter_codes[idx[0]]], fontfamily)
+        if not len(glyph.vertices):
+            continue
+        verts = numpy.empty((len(idx), len(glyph.vertices), 2))
+        verts[..., 0] = glyph.vertices[:, 0] * xscale + letter_site[idx, None]
+        verts[..., 1] = glyph.vertices[:, 1] * yscale[idx, None] + yoffset[idx, None]
+        paths.append(
+            matplotlib.path.Path(
+                verts.reshape(-1, 2), numpy.tile(glyph.codes, len(idx))
             )
-
-            ypos += letterheight
+        )
+        colors.append(layout.letter_colors[idx[0]])
+
+    ax.add_collection(
+        dmslogo.letters.LetterCollection(
+            paths,
+            glyphs=[_glyph_path(letter, fontfamily) for letter in unique_letters],
+            glyph_letters=list(unique_letters),
+            fontproperties=_setup_font(fontfamily, 1),
+            glyph_codes=letter_codes,
+            xscale=xscale,
+            xoffsets=letter_site,
+            yscales=yscale,
+            yoffsets=yoffset,
+            color_codes=color_codes,
+            colors=layout.letter_colors[
+                numpy.unique(color_codes, return_index=True)[1]
+            ],
+            facecolors=colors,
+            edgecolors="none",
+            linewidths=0,
+            clip_on=False,
+            zorder=3,
+        ),
+        autolim=False,
+    )
+    dmslogo.profiling.count("letters_drawn", len(layout.letters))
 
 
 def draw_logo(
@@ -268,7 +540,12 @@ def draw_logo(
     fixed_ymax=None,
     clip_negative_heights=False,
     drop_na_letter_heights=True,
+    validate=True,
     draw_line_at_zero="if_negative",
+    draw_letters=True,
+    dry_run=False,
+    backend="vector",
+    min_visible_height=None,
 ):
     """Draw sequence logo from specified letter heights.
 
@@ -321,7 +598,9 @@ def draw_logo(
         `hide_axis` (bool)
             Do we hide the axis and tick labels?
         `fontfamily` (str)
-            Font to use (for logo letters).
+            Font to use (for logo letters). Each letter is stretched so
+            its glyph outline exactly spans its height, so letters that
+            extend below the baseline in the font are stacked correctly.
         `fontaspect` (float)
             Aspect ratio of logo letter font (height to width). If letters are
             too crowded, increase this.
@@ -346,145 +625,253 @@ def draw_logo(
             Set to 0 any value in `letter_height_col` that is < 0.
         `drop_na_letter_heights` (bool)
             Drop any rows in `data` where `letter_height_col` is NaN.
+        `validate` (bool)
+            Check that `data` can be plotted. Set to `False` to skip the
+            checks if you have already checked `data` with
+            :func:`dmslogo.validation.validate_logo_data`, such as when
+            plotting the same data many times.
         `draw_line_at_zero` (str)
             Draw a horizontal line at the value of zero? Can have following
             values: 'if_negative' to only draw line if there are negative
             letter heights, 'always' to always draw line, and 'never' to
             never draw line.
+        `draw_letters` (bool)
+            Draw the logo letters. Set to `False` to only draw the axes and
+            everything else, such as if adding the letters separately.
+        `dry_run` (bool)
+            Do not create a figure or draw anything, just return the layout
+            quantities described below. Useful for sizing plots.
+        `backend` (str)
+            How to draw the logo. With 'vector', everything is drawn as
+            `matplotlib` artists. With 'raster', the letters, overlays,
+            shading, breaks, line at zero, and x-axis ticks and labels are
+            composited into a single image with :mod:`dmslogo.raster`, which
+            is much faster for large logos. The image has the resolution of
+            the figure's `dpi`, so save the figure at that `dpi`, and do not
+            resize the figure or axes after drawing.
+        `min_visible_height` (`None`, float, or str)
+            Do not draw letters with an absolute height less than this, or
+            with a height of zero, as they are too small to see. A float is
+            in the data units of the y-axis, and a str such as '0.5px' is
+            in pixels at the figure's `dpi`. The letters that are drawn are
+            stacked where they would be with all letters, so this greatly
+            speeds up drawing logos where most letters are tiny without
+            changing how they look.
 
     Returns:
         The 2-tuple `(fig, ax)` giving the figure and axis with the logo plots.
         If using `heatmap_overlays`, then `ax` will be an array of all axes
         (overlays and logo axes).
 
+        If `dry_run` is `True`, instead returns a dict keyed by: `width`
+        (width of figure that would be created), `xticks` and `xticklabels`
+        (x-axis ticks and labels, empty if `hide_axis`), and `ylim` (2-tuple
+        of y-axis limits).
+
     """
-    # set default values of arguments that can be None
-    if xtick_col is None:
-        xtick_col = x_col
-    if xlabel is None:
-        xlabel = xtick_col
-    if ylabel is None:
-        ylabel = letter_height_col
-
-    # check letters are all upper case
-    letters = str(data[letter_col].unique())
-    if letters.upper() != letters:
-        raise ValueError("letters in `letter_col` must be uppercase")
-
-    # checks on input data
-    for col in [letter_height_col, letter_col, x_col, xtick_col]:
-        if col not in data.columns:
-            raise ValueError(f"`data` lacks column {col}")
-    if (color_col is not None) and (color_col not in data.columns):
-        raise ValueError(f"`data` lacks column {color_col}")
-    if drop_na_letter_heights:
-        data = data[-data[letter_height_col].isna()]
-        if len(data) == 0:
-            raise ValueError("no data after dropping nan heights")
-    if clip_negative_heights:
-        data = data.assign(
-            **{letter_height_col: lambda x: numpy.clip(x[letter_height_col], 0, None)}
-        )
-    if any(data[x_col] != data[x_col].astype(int)):
-        raise ValueError("`x_col` does not have integer values")
-    if any(len(set(g[xtick_col])) != 1 for _, g in data.groupby(x_col)):
-        raise ValueError("not unique mapping of `x_col` to `xtick_col`")
-
-    # construct height_matrix: list of lists of (letter, height, color)
-    height_matrix = []
-    min_by_site = []
-    max_by_site = []
-    min_by_site_nonempty = []
-    max_by_site_nonempty = []
-    xticklabels = []
-    xticks = []
-    lastx = None
-    breaks = []
-    x_to_xtick = {}
-    xtick = 0.5
-    for x, xdata in data.sort_values([x_col, letter_height_col]).groupby(x_col):
-        if addbreaks and (lastx is not None) and (x != lastx + 1):
-            breaks.append(len(height_matrix))
-            height_matrix.append([])
-            min_by_site.append(0)
-            max_by_site.append(0)
-            xtick += 1
-        lastx = x
-
-        if len(xdata[letter_col]) != xdata[letter_col].nunique():
-            raise ValueError(f"duplicate letters for `x_col` {x}")
-
-        min_by_site.append(xdata[letter_height_col].clip(None, 0).sum())
-        max_by_site.append(xdata[letter_height_col].clip(0, None).sum())
-        min_by_site_nonempty.append(min_by_site[-1])
-        max_by_site_nonempty.append(max_by_site[-1])
-        row = []
-        for tup in xdata.itertuples(index=False):
-            letter = getattr(tup, letter_col)
-            if not (isinstance(letter, str) and len(letter) == 1):
-                raise ValueError(f"invalid letter of {letter}")
-            letter_height = getattr(tup, letter_height_col)
-            if color_col is not None:
-                color = getattr(tup, color_col)
-            else:
-                try:
-                    color = colorscheme[letter]
-                except KeyError:
-                    if missing_color:
-                        color = missing_color
-                    else:
-                        raise ValueError(f"no color for {letter}")
-            row.append(
-                (
-                    letter,
-                    abs(letter_height),
-                    color,
-                    "pad_below" if letter_height >= 0 else "pad_above",
-                )
-            )
-        height_matrix.append(row)
+    layout = dmslogo.layout.LogoLayout(
+        data,
+        x_col=x_col,
+        letter_col=letter_col,
+        letter_height_col=letter_height_col,
+        xtick_col=xtick_col,
+        color_col=color_col,
+        shade_color_col=shade_color_col,
+        shade_alpha_col=shade_alpha_col,
+        heatmap_overlays=heatmap_overlays,
+        colorscheme=colorscheme,
+        missing_color=missing_color,
+        addbreaks=addbreaks,
+        clip_negative_heights=clip_negative_heights,
+        drop_na_letter_heights=drop_na_letter_heights,
+        validate=validate,
+    )
+
+    return draw_logo_layout(
+        layout,
+        xlabel=xlabel,
+        ylabel=ylabel,
+        title=title,
+        widthscale=widthscale,
+        heightscale=heightscale,
+        heatmap_overlay_height=heatmap_overlay_height,
+        axisfontscale=axisfontscale,
+        hide_axis=hide_axis,
+        fontfamily=fontfamily,
+        fontaspect=fontaspect,
+        letterpad=letterpad,
+        letterheightscale=letterheightscale,
+        ax=ax,
+        ylim_setter=ylim_setter,
+        fixed_ymin=fixed_ymin,
+        fixed_ymax=fixed_ymax,
+        draw_line_at_zero=draw_line_at_zero,
+        draw_letters=draw_letters,
+        dry_run=dry_run,
+        backend=backend,
+        min_visible_height=min_visible_height,
+    )
+
+
+def draw_logo_matrix(
+    heights,
+    *,
+    alphabet=None,
+    sites=None,
+    site_labels=None,
+    colorscheme=dmslogo.colorschemes.AA_FUNCTIONAL_GROUP,
+    missing_color="gray",
+    addbreaks=True,
+    clip_negative_heights=False,
+    **kwargs,
+):
+    """Draw sequence logo from a matrix of letter heights.
+
+    Use this function rather than :func:`draw_logo` if you have a matrix
+    of the height of each letter at each site, as it stacks the letters
+    directly from the matrix without making a data frame with a row for
+    each letter.
+
+    Args:
+        `heights`, `alphabet`, `sites`, `site_labels`
+            Same meaning as for :meth:`dmslogo.layout.LogoLayout.from_matrix`.
+        `colorscheme`, `missing_color`, `addbreaks`, `clip_negative_heights`
+            Same meaning as for :func:`draw_logo`.
+        `**kwargs`
+            Other keyword arguments for :func:`draw_logo_layout`.
+
+    Returns:
+        Same as for :func:`draw_logo`.
+
+    The logo is the same as drawn by :func:`draw_logo` from the matrix in
+    long format:
+
+    >>> heights = pd.DataFrame([[1.0, 0.5, 0.2], [0.1, 2.0, numpy.nan]],
+    ...                        index=pd.Index([5, 6], name='site'),
+    ...                        columns=list('ACG'))
+    >>> with dmslogo.utils.pyplot_free():
+    ...     fig, _ = draw_logo_matrix(heights)
+    ...     fig.canvas.draw()
+    ...     image = numpy.asarray(fig.canvas.buffer_rgba()).copy()
+    >>> data = (heights.rename_axis(columns='letter')
+    ...         .stack()
+    ...         .rename('height')
+    ...         .reset_index())
+    >>> with dmslogo.utils.pyplot_free():
+    ...     fig, _ = draw_logo(data,
+    ...                        x_col='site',
+    ...                        letter_col='letter',
+    ...                        letter_height_col='height')
+    ...     fig.canvas.draw()
+    ...     (numpy.asarray(fig.canvas.buffer_rgba()) == image).all()
+    True
+
+    """
+    layout = dmslogo.layout.LogoLayout.from_matrix(
+        heights,
+        alphabet=alphabet,
+        sites=sites,
+        site_labels=site_labels,
+        colorscheme=colorscheme,
+        missing_color=missing_color,
+        addbreaks=addbreaks,
+        clip_negative_heights=clip_negative_heights,
+    )
+    return draw_logo_layout(layout, **kwargs)
+
+
+@dmslogo.utils._close_new_figures_on_error
+def draw_logo_layout(
+    layout,
+    *,
+    xlabel=None,
+    ylabel=None,
+    title=None,
+    widthscale=1,
+    heightscale=1,
+    heatmap_overlay_height=0.15,
+    axisfontscale=1,
+    hide_axis=False,
+    fontfamily=_DEFAULT_FONT,
+    fontaspect=0.58,
+    letterpad=0.0105,
+    letterheightscale=0.96,
+    ax=None,
+    ylim_setter=None,
+    fixed_ymin=None,
+    fixed_ymax=None,
+    draw_line_at_zero="if_negative",
+    draw_letters=True,
+    dry_run=False,
+    backend="vector",
+    min_visible_height=None,
+):
+    """Draw sequence logo from a pre-computed layout.
+
+    Use this function to draw a :class:`dmslogo.layout.LogoLayout` that has
+    already been computed from the data, such as to re-draw the same logo
+    several times without re-processing the data.
 
-        assert len(xdata[xtick_col].unique()) == 1
-        xticklabels.append(str(xdata[xtick_col].values[0]))
+    Args:
+        `layout` (:class:`dmslogo.layout.LogoLayout`)
+            Layout of logo to draw.
+        `xlabel`, `ylabel`, `title`, `widthscale`, `heightscale`,
+        `heatmap_overlay_height`, `axisfontscale`, `hide_axis`, `fontfamily`,
+        `fontaspect`, `letterpad`, `letterheightscale`, `ax`, `ylim_setter`,
+        `fixed_ymin`, `fixed_ymax`, `draw_line_at_zero`, `draw_letters`,
+        `dry_run`, `backend`, `min_visible_height`
+            Same meaning as for :func:`draw_logo`.
 
-        xticks.append(xtick)
-        x_to_xtick[x] = xtick
-        xtick += 1
+    Returns:
+        Same as for :func:`draw_logo`.
 
-    assert len(xticklabels) == len(xticks)
+    """
+    if xlabel is None:
+        xlabel = layout.xtick_col
+    if ylabel is None:
+        ylabel = layout.letter_height_col
 
     if draw_line_at_zero == "always":
         line_at_zero = True
     elif draw_line_at_zero == "never":
         line_at_zero = False
     elif draw_line_at_zero == "if_negative":
-        if min(min_by_site) < 0:
+        if layout.min_by_site.min() < 0:
             line_at_zero = True
         else:
             line_at_zero = False
     else:
         raise ValueError(f"invalid `draw_line_at_zero` {draw_line_at_zero}")
 
-    # do we have overlays?
-    if heatmap_overlays:
-        noverlays = len(heatmap_overlays)
-        for overlay in heatmap_overlays:
-            if overlay not in data.columns:
-                raise ValueError(f"`data` lacks `heatmap_overlay` {overlay}")
-            else:
-                overlay_data = data[[x_col] + list(heatmap_overlays)].drop_duplicates()
-                if not all(
-                    overlay_data.values
-                    == (overlay_data.groupby(x_col, as_index=False).first())
-                ):
-                    raise ValueError("Overlay not unique per site:\n" + overlay_data)
-    else:
-        heatmap_overlays = []
-        noverlays = 0
+    if backend not in {"vector", "raster"}:
+        raise ValueError(f"invalid `backend` {backend}")
+    raster = backend == "raster"
+
+    noverlays = len(layout.overlay_colors)
+
+    ylim = layout.ylims(
+        ylim_setter=ylim_setter, fixed_ymin=fixed_ymin, fixed_ymax=fixed_ymax
+    )
+
+    if dry_run:
+        width, _ = layout.figsize(
+            widthscale=widthscale,
+            heightscale=heightscale,
+            heatmap_overlay_height=heatmap_overlay_height,
+            hide_axis=hide_axis,
+            title=title,
+        )
+        return {
+            "width": width,
+            "xticks": [] if hide_axis else layout.xticks.tolist(),
+            "xticklabels": [] if hide_axis else list(layout.xticklabels),
+            "ylim": ylim,
+        }
 
     # setup axis for plotting
+    phases = dmslogo.profiling._PhaseSequence()
     if not ax:
-        fig, axes = plt.subplots(
+        fig, axes = dmslogo.utils.subplots(
             nrows=1 + noverlays,
             ncols=1,
             sharex=True,
@@ -497,32 +884,34 @@ def draw_logo(
         axes = axes.ravel()
         assert len(axes) == 1 + noverlays, axes
         fig.set_size_inches(
-            (
-                widthscale * 0.35 * (len(height_matrix) + int(not hide_axis)),
-                heightscale
-                * (
-                    2
-                    + 0.5 * int(not hide_axis)
-                    + 2 * noverlays * heatmap_overlay_height
-                    + 0.5 * int(bool(title))
-                ),
+            layout.figsize(
+                widthscale=widthscale,
+                heightscale=heightscale,
+                heatmap_overlay_height=heatmap_overlay_height,
+                hide_axis=hide_axis,
+                title=title,
             )
         )
         ax = axes[-1]
+        nartists = 0
     else:
         if noverlays:
             if len(ax) != noverlays + 1:
                 raise ValueError(f"`ax` not axes for {noverlays} overlays")
-                axes = ax
-                ax = axes[0]
+            axes = list(ax)
+            ax = axes[-1]
         else:
             if not isinstance(ax, plt.Axes):
                 raise TypeError(f"`ax` is not an Axis: {ax}")
             axes = [ax]
         fig = ax.get_figure()
+        nartists = dmslogo.profiling._artist_count(fig)
 
     # draw overlays
-    for overlay, overlay_ax in zip(heatmap_overlays, axes):
+    phases.enter("decorations")
+    for (overlay, overlay_colors), overlay_ax in zip(
+        layout.overlay_colors.items(), axes
+    ):
         overlay_ax.set_yticks([0.5])
         overlay_ax.set_yticklabels([overlay])
         overlay_ax.tick_params("y", labelsize=14 * axisfontscale, length=0)
@@ -534,43 +923,37 @@ def draw_logo(
             bottom=True,
         )
         overlay_ax.get_xaxis().set_visible(False)
-        for x, color in overlay_data.set_index(x_col)[overlay].items():
-            xtick = x_to_xtick[x]
-            overlay_ax.add_patch(
-                plt.Rectangle(
-                    xy=(xtick - 0.5, 0),
-                    width=1,
-                    height=1,
-                    facecolor=color,
-                    edgecolor="black",
-                    linewidth=1,
-                    clip_on=False,
-                )
+        if raster:
+            continue
+        # one unit square per site
+        squares = numpy.empty((len(layout.xticks), 4, 2))
+        squares[..., 0] = layout.xticks[:, None] + [-0.5, -0.5, 0.5, 0.5]
+        squares[..., 1] = [0, 1, 1, 0]
+        overlay_ax.add_collection(
+            matplotlib.collections.PolyCollection(
+                squares,
+                facecolors=list(overlay_colors),
+                edgecolors="black",
+                linewidths=1,
+                clip_on=False,
             )
+        )
 
+    phases.enter("axes")
     if title:
         axes[0].set_title(title, fontsize=17 * axisfontscale)
 
-    xpad = 0.2
-    ax.set_xlim(-xpad, len(height_matrix) + xpad)
-
-    # set y-limits
-    if ylim_setter is None:
-        ylim_setter = dmslogo.utils.AxLimSetter()
-    ymin1, ymax1 = ylim_setter.get_lims(min_by_site_nonempty)
-    ymin2, ymax2 = ylim_setter.get_lims(max_by_site_nonempty)
-    ymin = min(ymin1, ymin2)
-    ymax = max(ymax1, ymax2)
-    if fixed_ymin is not None:
-        ymin = fixed_ymin
-    if fixed_ymax is not None:
-        ymax = fixed_ymax
-    ax.set_ylim(ymin, ymax)
+    ax.set_xlim(*layout.xlim)
+    ax.set_ylim(*ylim)
 
     if not hide_axis:
-        ax.set_xticks(xticks)
+        if raster:
+            # x-ticks are drawn in the image
+            ax.set_xticks([])
+        else:
+            ax.set_xticks(layout.xticks)
+            ax.set_xticklabels(layout.xticklabels, rotation=90, ha="center", va="top")
         ax.tick_params(length=5, width=1)
-        ax.set_xticklabels(xticklabels, rotation=90, ha="center", va="top")
         ax.yaxis.set_major_locator(matplotlib.ticker.MaxNLocator(4))
         ax.tick_params("both", labelsize=12 * axisfontscale)
         ax.set_xlabel(xlabel, fontsize=17 * axisfontscale)
@@ -579,20 +962,42 @@ def draw_logo(
     else:
         ax.axis("off")
 
+    if raster:
+        phases.enter("letters")
+        dmslogo.raster.draw_raster_logo(
+            layout,
+            ax,
+            axes,
+            fontfamily=fontfamily,
+            fontaspect=fontaspect,
+            letterpad=letterpad,
+            letterheightscale=letterheightscale,
+            axisfontscale=axisfontscale,
+            hide_axis=hide_axis,
+            line_at_zero=line_at_zero,
+            draw_letters=draw_letters,
+            min_visible_height=min_visible_height,
+        )
+        phases.close()
+        dmslogo.profiling._count_artists_created(fig, nartists)
+        return (fig, ax) if len(axes) == 1 else (fig, axes)
+
     # draw the letters
-    _draw_text_data_coord(
-        height_matrix,
-        min_by_site,
-        ax,
-        fontfamily,
-        fontaspect,
-        letterpad,
-        letterheightscale,
-        xpad,
-    )
+    phases.enter("letters")
+    if draw_letters:
+        _draw_text_data_coord(
+            layout,
+            ax,
+            fontfamily,
+            fontaspect,
+            letterpad,
+            letterheightscale,
+            min_visible_height,
+        )
 
     # draw the breaks
-    for x in breaks:
+    phases.enter("decorations")
+    for x in layout.breaks:
         # loosely dotted line:
         # https://matplotlib.org/gallery/lines_bars_and_markers/linestyles.html
         ax.axvline(x=x + 0.5, ls=(0, (2, 5)), color="black", lw=1)
@@ -602,38 +1007,28 @@ def draw_logo(
         ax.axhline(y=0, ls="-", color="black", lw=1, zorder=4)
 
     # draw the shading
-    if shade_color_col is not None:
-        if shade_alpha_col is None:
-            raise ValueError("`shade_color_col` without `shade_alpha_col`")
-        if shade_color_col not in data.columns:
-            raise ValueError(f"data lacks `shade_color_col` {shade_color_col}")
-        if shade_alpha_col not in data.columns:
-            raise ValueError(f"data lacks `shade_alpha_col` {shade_alpha_col}")
-        for x, xdata in data.groupby(x_col):
-            shade_color = xdata[shade_color_col].unique()
-            if len(shade_color) != 1:
-                raise ValueError(f"not exactly one shade color for {x}")
-            else:
-                shade_color = shade_color[0]
-            shade_alpha = xdata[shade_alpha_col].unique()
-            if len(shade_alpha) != 1:
-                raise ValueError(f"not exactly one shade alpha for {x}")
-            else:
-                shade_alpha = shade_alpha[0]
-            if pd.isnull(shade_color) or not shade_color:
-                continue
-            elif not (0 <= shade_alpha <= 1):
-                raise ValueError(f"shade alpha not between 0 and 1 for {x}")
-            xtick = x_to_xtick[x]
-            ax.axvspan(
-                xmin=xtick - 0.5,
-                xmax=xtick + 0.5,
-                edgecolor=None,
-                facecolor=shade_color,
-                alpha=shade_alpha,
+    if layout.shade_colors is not None:
+        shaded = numpy.flatnonzero([color is not None for color in layout.shade_colors])
+        if len(shaded):
+            rgba = numpy.array(
+                [dmslogo.layout._to_rgba(c) for c in layout.shade_colors[shaded]]
+            )
+            rgba[:, 3] = layout.shade_alphas[shaded]
+            # spans full height of axis, so y is in axes coordinates
+            spans = numpy.empty((len(shaded), 4, 2))
+            spans[..., 0] = layout.xticks[shaded, None] + [-0.5, -0.5, 0.5, 0.5]
+            spans[..., 1] = [0, 1, 1, 0]
+            ax.add_collection(
+                matplotlib.collections.PolyCollection(
+                    spans,
+                    facecolors=rgba,
+                    edgecolors="none",
+                    transform=ax.get_xaxis_transform(),
+                ),
+                autolim=False,
             )
-    elif shade_alpha_col is not None:
-        raise ValueError("`shade_alpha_col` without `shade_color_col`")
+    phases.close()
+    dmslogo.profiling._count_artists_created(fig, nartists)
 
     if len(axes) == 1:
         return fig, ax
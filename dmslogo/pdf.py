@@ -0,0 +1,201 @@
+"""
+===
+pdf
+===
+
+Write logo letters compactly to PDF.
+
+When a figure is saved as PDF, the letters of a
+:class:`dmslogo.letters.LetterCollection` are written as text in the
+logo font, which is embedded in the PDF with only the letters that are
+used. Each letter is placed by its own text matrix, which stretches its
+glyph to the letter's height. So the outline of each glyph is only stored
+once, rather than once for every letter.
+
+The font is embedded as set by the `matplotlib` ``pdf.fonttype`` setting:
+as a Type 3 font (the default) or as a Type 42 (TrueType) font. If the
+letters cannot be written as text (such as with the ``pdf.use14corefonts``
+setting, or letters not in the font), they are drawn as paths.
+
+>>> import io
+>>> import dmslogo
+>>> import dmslogo.testing
+>>> import dmslogo.utils
+>>> data = dmslogo.testing.simulate_dms_data(100, alphabet='ACGT')
+>>> with dmslogo.utils.pyplot_free():
+...     fig, ax = dmslogo.draw_logo(data,
+...                                 x_col='site',
+...                                 letter_col='letter',
+...                                 letter_height_col='height',
+...                                 hide_axis=True)
+...     pdf = io.BytesIO()
+...     with matplotlib.rc_context({'pdf.compression': 0}):
+...         fig.savefig(pdf, format='pdf')
+>>> pdf = pdf.getvalue()
+>>> pdf.count(b' Tm '), len(data)
+(400, 400)
+>>> b'DejaVuSansMonoBold_SeqLogo' in pdf
+True
+
+The writer uses private parts of `matplotlib`'s PDF backend. If they are
+missing from a version of `matplotlib`, or the letters cannot be text as
+here, the letters are drawn as paths instead:
+
+>>> with matplotlib.rc_context({'pdf.compression': 0,
+...                             'pdf.use14corefonts': True}):
+...     pdf = io.BytesIO()
+...     fig.savefig(pdf, format='pdf')
+>>> pdf.getvalue().count(b' Tm ')
+0
+
+"""
+
+
+import matplotlib
+import matplotlib.backends.backend_pdf
+import matplotlib.font_manager
+
+import numpy
+
+
+def _letters_font(collection):
+    """Font for text of letters in `collection`, or `None` if cannot use.
+
+    Args:
+        `collection` (:class:`dmslogo.letters.LetterCollection`)
+            Letters to write.
+
+    Returns:
+        A `matplotlib.ft2font.FT2Font` with all of the letters if they can
+        be written as text with the current `matplotlib` settings,
+        otherwise `None`.
+
+    """
+    fonttype = matplotlib.rcParams["pdf.fonttype"]
+    if matplotlib.rcParams["pdf.use14corefonts"] or fonttype not in {3, 42}:
+        return None
+    font_supports_glyph = getattr(
+        matplotlib.backends.backend_pdf, "_font_supports_glyph", None
+    )
+    if font_supports_glyph is None:
+        return None
+    font = matplotlib.font_manager.get_font(
+        matplotlib.font_manager.findfont(collection.fontproperties)
+    )
+    for letter in collection.glyph_letters:
+        if (
+            len(letter) != 1
+            or not font_supports_glyph(fonttype, ord(letter))
+            or not font.get_char_index(ord(letter))
+        ):
+            return None
+    return font
+
+
+def _can_write_letters_pdf(renderer, collection):
+    """Whether `collection` can be written by :func:`_write_letters_pdf`.
+
+    Args:
+        `renderer` (matplotlib.backends.backend_pdf.RendererPdf)
+            Renderer writing the PDF.
+        `collection` (:class:`dmslogo.letters.LetterCollection`)
+            Letters to write.
+
+    Returns:
+        `False` if the letters cannot be text, or if `renderer` or the
+        `matplotlib` PDF backend lack the private attributes used to write
+        them.
+
+    >>> _can_write_letters_pdf(object(), None)
+    False
+
+    """
+    backend_pdf = matplotlib.backends.backend_pdf
+    pdffile = getattr(renderer, "file", None)
+    return (
+        all(hasattr(backend_pdf, attr) for attr in ["pdfRepr", "Op"])
+        and all(
+            hasattr(backend_pdf.Op, attr)
+            for attr in ["begin_text", "end_text", "selectfont", "textmatrix", "show"]
+        )
+        and all(
+            hasattr(renderer, attr) for attr in ["encode_string", "check_gc", "new_gc"]
+        )
+        and all(
+            hasattr(pdffile, attr)
+            for attr in ["_character_tracker", "fontName", "output", "write"]
+        )
+        and hasattr(pdffile._character_tracker, "track")
+        and _letters_font(collection) is not None
+    )
+
+
+def _fmt(values, decimals):
+    """Format `values` as short byte strings rounded to `decimals`."""
+    # adding zero turns -0.0 into 0.0
+    return [b"%.12g" % value for value in (numpy.round(values, decimals) + 0).tolist()]
+
+
+def _write_letters_pdf(renderer, collection, transform):
+    """Write :class:`dmslogo.letters.LetterCollection` with `RendererPdf`.
+
+    Args:
+        `renderer` (matplotlib.backends.backend_pdf.RendererPdf)
+            Renderer writing the PDF.
+        `collection` (:class:`dmslogo.letters.LetterCollection`)
+            Letters to write, which with `renderer` pass
+            :func:`_can_write_letters_pdf`.
+        `transform` (matplotlib.transforms.Transform)
+            Affine transform from data to display coordinates.
+
+    """
+    pdf_repr = matplotlib.backends.backend_pdf.pdfRepr
+    op = matplotlib.backends.backend_pdf.Op
+    fonttype = matplotlib.rcParams["pdf.fonttype"]
+    pdffile = renderer.file
+    font = _letters_font(collection)
+    glyph_codes = collection.glyph_codes
+    used = numpy.flatnonzero(
+        numpy.bincount(glyph_codes, minlength=len(collection.glyphs))
+    )
+    pdffile._character_tracker.track(
+        font, "".join(collection.glyph_letters[code] for code in used.tolist())
+    )
+    fontname = pdffile.fontName(font.fname)
+    strings = [
+        pdf_repr(renderer.encode_string(letter, fonttype))
+        for letter in collection.glyph_letters
+    ]
+    has_outline = [len(glyph.vertices) > 0 for glyph in collection.glyphs]
+
+    # text matrix of each letter for font size of one, so one unit of
+    # text space is one em
+    matrices = collection.letter_matrices(transform)
+    a, b = _fmt(matrices[0, :2], 5) if len(matrices) else (b"", b"")
+    c = _fmt(matrices[:, 2], 5)
+    d = _fmt(matrices[:, 3], 5)
+    e = _fmt(matrices[:, 4], 3)
+    f = _fmt(matrices[:, 5], 3)
+    textmatrix = pdf_repr(op.textmatrix)
+    show = pdf_repr(op.show)
+
+    gc = renderer.new_gc()
+    for rgba, indices in collection.color_groups():
+        renderer.check_gc(gc, rgba)
+        pdffile.output(op.begin_text, fontname, 1, op.selectfont)
+        pdffile.write(
+            b"".join(
+                b"%s %s %s %s %s %s %s %s %s\n"
+                % (a, b, c[i], d[i], e[i], f[i], textmatrix, strings[code], show)
+                for i, code in zip(indices.tolist(), glyph_codes[indices].tolist())
+                if has_outline[code]
+            )
+        )
+        pdffile.output(op.end_text)
+    gc.restore()
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
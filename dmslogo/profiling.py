@@ -0,0 +1,258 @@
+"""
+=========
+profiling
+=========
+
+Record where time goes when drawing plots.
+
+Within a :func:`profile` context, the plotting functions of `dmslogo`
+record the wall time spent in each phase of drawing, and count the
+figures, artists and letters they create and the canvas draws they
+trigger. When not profiling, this adds negligible overhead.
+
+The phases are:
+
+ - ``validation``: checking the data passed to :func:`dmslogo.draw_logo`.
+ - ``layout``: computing the letter stacks, overlays and shading of a
+   :class:`dmslogo.layout.LogoLayout`, or the positions in
+   :func:`dmslogo.draw_line`.
+ - ``sizing``: computing the sizes of the panels of
+   :func:`dmslogo.facet_plot`.
+ - ``figure``: creating figures.
+ - ``axes``: setting up axes limits, ticks, labels and titles.
+ - ``letters``: creating the logo letters.
+ - ``lines``: creating the lines of :func:`dmslogo.draw_line`.
+ - ``decorations``: creating overlays, breaks, shading, and lines at zero.
+ - ``canvas_draw``: drawing the figure canvas, such as to lay out
+   :func:`dmslogo.facet_plot`.
+ - ``savefig``: saving figures in :func:`dmslogo.batch.render_many`.
+
+The counters are ``figures_created``, ``artists_created``,
+``letters_drawn``, ``letters_culled`` and ``canvas_draws``.
+
+Use :func:`phase` to time your own code (such as saving the figure) as
+part of the same profile:
+
+>>> import pandas as pd
+>>> import dmslogo
+>>> data = pd.DataFrame({'site': [1, 1, 2],
+...                      'letter': ['A', 'C', 'G'],
+...                      'height': [1.0, 0.5, 2.0]})
+>>> import io
+>>> with profile() as stats:
+...     fig, ax = dmslogo.draw_logo(data,
+...                                 x_col='site',
+...                                 letter_col='letter',
+...                                 letter_height_col='height')
+...     with phase('savefig'):
+...         fig.savefig(io.BytesIO())
+>>> list(stats.phases)
+['validation', 'layout', 'figure', 'decorations', 'axes', 'letters', 'savefig']
+>>> stats.counts['figures_created'], stats.counts['letters_drawn']
+(1, 3)
+>>> stats.counts['artists_created'] > 0
+True
+>>> stats.total_time() > 0
+True
+
+"""
+
+
+import collections
+import contextlib
+import contextvars
+import time
+
+
+# tuple of `RenderStats` for active `profile` contexts
+_active_stats = contextvars.ContextVar("_active_stats", default=())
+
+# `True` while artists are counted by an enclosing plotting function
+_artists_counted = contextvars.ContextVar("_artists_counted", default=False)
+
+
+class RenderStats:
+    """Statistics recorded by :func:`profile`.
+
+    Attributes:
+        `phases` (dict)
+            Keyed by name of each phase in the order first entered, with
+            values giving the total wall time in seconds spent in that phase.
+        `phase_calls` (collections.Counter)
+            Number of times each phase was entered.
+        `counts` (collections.Counter)
+            Number of figures created (``figures_created``), artists created
+            (``artists_created``), letters drawn (``letters_drawn``),
+            letters not drawn as too small to see (``letters_culled``) and
+            canvas draws triggered (``canvas_draws``).
+
+    Time in a phase entered while already in another phase is only counted
+    in the inner phase, so the times of the phases add up to the total time.
+
+    """
+
+    def __init__(self, on_phase=None):
+        """See main class docstring."""
+        self.phases = {}
+        self.phase_calls = collections.Counter()
+        self.counts = collections.Counter(
+            {
+                key: 0
+                for key in [
+                    "figures_created",
+                    "artists_created",
+                    "letters_drawn",
+                    "letters_culled",
+                    "canvas_draws",
+                ]
+            }
+        )
+        self._on_phase = on_phase
+        # entries `[name, start time, time in inner phases]` of open phases
+        self._open_phases = []
+
+    def __repr__(self):
+        """Summary of statistics."""
+        phases = ", ".join(f"{name}={t:.3g}s" for name, t in self.phases.items())
+        counts = ", ".join(f"{name}={n}" for name, n in self.counts.items())
+        return f"RenderStats({phases}; {counts})"
+
+    def total_time(self):
+        """Total wall time in seconds spent in any phase."""
+        return sum(self.phases.values())
+
+    def _begin_phase(self, name):
+        self._open_phases.append([name, time.perf_counter(), 0.0])
+
+    def _end_phase(self, name):
+        end = time.perf_counter()
+        # phases left open by an exception are discarded
+        while self._open_phases:
+            open_name, start, inner_seconds = self._open_phases.pop()
+            if open_name == name:
+                break
+        else:
+            return
+        seconds = end - start
+        if self._open_phases:
+            self._open_phases[-1][2] += seconds
+        seconds -= inner_seconds
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        self.phase_calls[name] += 1
+        if self._on_phase is not None:
+            self._on_phase(name, seconds)
+
+
+@contextlib.contextmanager
+def profile(on_phase=None):
+    """Context manager that records statistics of plots drawn within it.
+
+    Args:
+        `on_phase` (`None` or callable)
+            Called as `on_phase(name, seconds)` each time a phase ends.
+
+    Yields:
+        A :class:`RenderStats` that is filled in as plots are drawn. Contexts
+        can be nested, in which case statistics are recorded in all of them.
+
+    """
+    stats = RenderStats(on_phase=on_phase)
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def is_profiling():
+    """Whether statistics are being recorded by :func:`profile`."""
+    return bool(_active_stats.get())
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Context manager that records time spent in it as phase `name`."""
+    active_stats = _active_stats.get()
+    for stats in active_stats:
+        stats._begin_phase(name)
+    try:
+        yield
+    finally:
+        for stats in active_stats:
+            stats._end_phase(name)
+
+
+class _PhaseSequence:
+    """Record consecutive phases of a plotting function.
+
+    Calling :meth:`enter` ends the current phase (if any) and begins a new
+    one, and :meth:`close` ends the current phase. This times a function
+    that goes through several phases without nesting its code in
+    :func:`phase` contexts. A phase that is not ended because of an
+    exception is not recorded.
+
+    """
+
+    def __init__(self):
+        """See main class docstring."""
+        self._active_stats = _active_stats.get()
+        self._name = None
+
+    def enter(self, name):
+        """End current phase and begin phase `name`."""
+        self.close()
+        for stats in self._active_stats:
+            stats._begin_phase(name)
+        self._name = name
+
+    def close(self):
+        """End current phase."""
+        if self._name is not None:
+            for stats in self._active_stats:
+                stats._end_phase(self._name)
+            self._name = None
+
+
+def count(counter, n=1):
+    """Add `n` to `counter` in statistics being recorded."""
+    for stats in _active_stats.get():
+        stats.counts[counter] += n
+
+
+def _artist_count(fig):
+    """Number of artists in `fig` if counting artists, otherwise 0.
+
+    Plotting functions call this when they start using an existing figure,
+    and pass the result to :func:`_count_artists_created` when done.
+
+    """
+    if is_profiling() and not _artists_counted.get():
+        return len(fig.findobj())
+    return 0
+
+
+def _count_artists_created(fig, nbefore):
+    """Count artists in `fig` beyond `nbefore` as ``artists_created``."""
+    if is_profiling() and not _artists_counted.get():
+        count("artists_created", len(fig.findobj()) - nbefore)
+
+
+@contextlib.contextmanager
+def _artists_counted_by_caller():
+    """Context in which plotting functions do not count their artists.
+
+    Used when a plotting function calls others on its own figure and
+    counts all of the artists itself.
+
+    """
+    token = _artists_counted.set(True)
+    try:
+        yield
+    finally:
+        _artists_counted.reset(token)
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,581 @@
+"""
+======
+raster
+======
+
+Draw logo plots into an image with `numpy` rather than as `matplotlib`
+artists.
+
+This is used by :func:`dmslogo.logo.draw_logo` with `backend="raster"`.
+Each glyph is rendered once at high resolution and then resampled with
+an exact box filter to the size of every letter, all with vectorized array
+operations. The x-axis ticks and labels, breaks, shading, overlays, and
+line at zero are drawn into the same image, so the only `matplotlib`
+artists are the image, the spines, the y-axis, and the axis labels and
+title. This is much faster for large logos, which otherwise need many
+thousands of artists.
+
+The image is computed at the figure's `dpi`, and looks nearly the same
+as the logo drawn with `backend="vector"`:
+
+>>> import io
+>>> import matplotlib.image
+>>> import dmslogo
+>>> import dmslogo.testing
+>>> import dmslogo.utils
+>>> data = dmslogo.testing.simulate_dms_data(30, negative_fraction=0.2)
+>>> images = {}
+>>> with dmslogo.utils.pyplot_free():
+...     for backend in ['vector', 'raster']:
+...         fig, ax = dmslogo.draw_logo(data,
+...                                     x_col='site',
+...                                     letter_col='letter',
+...                                     letter_height_col='height',
+...                                     xtick_col='site_label',
+...                                     backend=backend)
+...         png = io.BytesIO()
+...         fig.savefig(png, dpi=fig.dpi, format='png')
+...         _ = png.seek(0)
+...         images[backend] = matplotlib.image.imread(png)
+>>> images['vector'].shape == images['raster'].shape
+True
+>>> float(abs(images['vector'] - images['raster']).mean()) < 0.05
+True
+
+"""
+
+
+import matplotlib
+import matplotlib.backends.backend_agg
+import matplotlib.font_manager
+import matplotlib.transforms
+
+import numpy
+
+import dmslogo.cache
+import dmslogo.layout
+import dmslogo.logo
+import dmslogo.profiling
+
+
+#: pixels in the height of the pre-rendered glyph bitmaps
+GLYPH_RESOLUTION = 256
+
+# maximum number of pixels resampled at once for a group of letters
+_CHUNK_PIXELS = 2**20
+
+
+@dmslogo.cache.lru_cache(maxsize=1024)
+def _glyph_coverage(letter, fontfamily):
+    """Integral image of glyph bitmap for `letter` in `fontfamily`.
+
+    Returns:
+        The 2-tuple `(integral, (x0, x1))`. The glyph is rendered so its
+        outline exactly fills a bitmap of :data:`GLYPH_RESOLUTION` rows,
+        with columns in proportion to its width. `integral` is the summed
+        area table of the coverage of that bitmap with a leading row and
+        column of zeros, with the first row the top of the glyph. `x0` and
+        `x1` give the horizontal extent of the outline in em units. If the
+        glyph has no outline, returns `None`.
+
+    """
+    glyph = dmslogo.logo._glyph_path(letter, fontfamily)
+    if not len(glyph.vertices):
+        return None
+    extent = glyph.get_extents()
+    nrows = GLYPH_RESOLUTION
+    ncols = max(1, round(nrows * extent.width / extent.height))
+    renderer = matplotlib.backends.backend_agg.RendererAgg(ncols, nrows, 72)
+    gc = renderer.new_gc()
+    gc.set_linewidth(0)
+    transform = (
+        matplotlib.transforms.Affine2D()
+        .translate(-extent.x0, -extent.y0)
+        .scale(ncols / extent.width, nrows / extent.height)
+    )
+    renderer.draw_path(gc, glyph, transform, (0, 0, 0, 1))
+    coverage = numpy.asarray(renderer.buffer_rgba())[..., 3] / 255
+    integral = numpy.zeros((nrows + 1, ncols + 1), dtype="float32")
+    integral[1:, 1:] = coverage.cumsum(axis=0).cumsum(axis=1)
+    return integral, (float(extent.x0), float(extent.x1))
+
+
+def _default_font_path():
+    """Path to file of the current default `matplotlib` font."""
+    return matplotlib.font_manager.findfont(matplotlib.font_manager.FontProperties())
+
+
+@dmslogo.cache.lru_cache(maxsize=4096)
+def _text_coverage(text, fontsize, dpi, fontpath):
+    """Coverage of `text` at `fontsize` in points as rendered at `dpi`.
+
+    Args:
+        `text` (str)
+            Text to render.
+        `fontsize` (float)
+            Font size in points.
+        `dpi` (float)
+            Resolution in dots per inch.
+        `fontpath` (str)
+            Path to font file, such as from :func:`_default_font_path`. It
+            is part of the cache key, so changing the font in `rcParams`
+            does not return text rendered in the old font.
+
+    Returns:
+        Array of coverage between 0 and 1 with first row the top of the text.
+
+    """
+    font = matplotlib.font_manager.get_font(fontpath)
+    font.set_size(fontsize, dpi)
+    font.set_text(text, 0.0, flags=matplotlib.backends.backend_agg.get_hinting_flag())
+    font.draw_glyphs_to_bitmap(antialiased=True)
+    return numpy.asarray(font.get_image()) / 255
+
+
+def _lerp_rows(table, s):
+    """Linearly interpolate rows of `table` at fractional row indices `s`."""
+    i = numpy.minimum(s.astype(int), len(table) - 2)
+    f = (s - i)[:, None]
+    return table[i] * (1 - f) + table[i + 1] * f
+
+
+def _pixel_spans(start, end):
+    """Pixels spanned by intervals and the fraction of each that is covered.
+
+    Args:
+        `start`, `end` (numpy.ndarray)
+            Start and end of each interval in pixels.
+
+    Returns:
+        The 3-tuple `(interval, pixel, coverage)` of flat arrays giving
+        each interval and pixel it overlaps, and the fraction of the pixel
+        covered by the interval.
+
+    """
+    first = numpy.floor(start).astype(int)
+    npixels = numpy.maximum(numpy.ceil(end).astype(int) - first, 0)
+    interval = numpy.repeat(numpy.arange(len(start)), npixels)
+    pixel = (
+        numpy.arange(len(interval))
+        - numpy.repeat(numpy.cumsum(npixels) - npixels, npixels)
+        + first[interval]
+    )
+    coverage = numpy.minimum(pixel + 1, end[interval]) - numpy.maximum(
+        pixel, start[interval]
+    )
+    return interval, pixel, coverage
+
+
+class _Canvas:
+    """RGBA image covering a box of the figure in display pixels.
+
+    Args:
+        `x0`, `y0`, `x1`, `y1` (int)
+            Box of the figure covered, in display pixels from the lower left.
+
+    Methods take positions in display pixels, and composite over what has
+    already been drawn.
+
+    """
+
+    def __init__(self, x0, y0, x1, y1):
+        """See main class docstring."""
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        # premultiplied RGBA with first row the top of the box
+        self._rgba = numpy.zeros((y1 - y0, x1 - x0, 4), dtype="float32")
+
+    def image(self):
+        """RGBA `uint8` image with straight alpha, first row the top of box."""
+        alpha = self._rgba[..., 3:]
+        # color is zero wherever alpha is zero
+        image = self._rgba * (255 / numpy.maximum(alpha, numpy.float32(1e-6)))
+        image[..., 3:] = alpha * 255
+        image += 0.5
+        return image.astype("uint8")
+
+    def _blend(self, rows, cols, coverage, color):
+        """Composite `color` with `coverage` over pixels at `rows`, `cols`.
+
+        `rows`, `cols` and `coverage` are flat arrays, and `color` is
+        an RGBA color or array of one for each pixel. A pixel that occurs
+        more than once is composited once for each occurrence in order, as
+        if each were drawn separately, so shapes that share a pixel at their
+        edges both cover it:
+
+        >>> canvas = _Canvas(0, 0, 1, 1)
+        >>> canvas.fill_rects([0, 0.5], [0.5, 1], 0, 1, (0, 0, 0, 1))
+        >>> canvas.image()[0, 0].tolist()
+        [0, 0, 0, 191]
+
+        """
+        keep = (
+            (coverage > 0)
+            & (rows >= 0)
+            & (rows < self._rgba.shape[0])
+            & (cols >= 0)
+            & (cols < self._rgba.shape[1])
+        )
+        color = numpy.asarray(color, dtype="float32")
+        if color.ndim > 1:
+            color = color[keep]
+        pixels = rows[keep] * self._rgba.shape[1] + cols[keep]
+        alpha = numpy.minimum(coverage[keep], 1, dtype="float32")[:, None]
+        alpha *= color[..., 3:]
+        src = numpy.concatenate([color[..., :3] * alpha, alpha], axis=1)
+        # `put` keeps only the last of repeated pixels, so composite the
+        # first occurrence of each pixel, then the second, and so on
+        order = numpy.argsort(pixels, kind="stable")
+        sorted_pixels = pixels[order]
+        starts = numpy.ones(len(pixels), dtype="bool")
+        starts[1:] = sorted_pixels[1:] != sorted_pixels[:-1]
+        occurrence = numpy.empty(len(pixels), dtype="int64")
+        occurrence[order] = numpy.arange(len(pixels)) - numpy.maximum.accumulate(
+            numpy.where(starts, numpy.arange(len(pixels)), 0)
+        )
+        # view each RGBA pixel as one item for fast `take` and `put`
+        rgba = self._rgba.reshape(-1).view("complex128")
+        for i in range(occurrence.max(initial=-1) + 1):
+            if i == 0 and starts.all():
+                select = slice(None)
+            else:
+                select = occurrence == i
+            under = rgba.take(pixels[select]).view("float32").reshape(-1, 4)
+            rgba.put(
+                pixels[select],
+                (src[select] + under * (1 - alpha[select])).view("complex128"),
+            )
+
+    def fill_rects(self, left, right, bottom, top, color):
+        """Fill rectangles, with partial coverage of pixels at their edges.
+
+        The positions are broadcast together, and `color` is an RGBA color
+        or array of one for each rectangle.
+
+        """
+        left, right, bottom, top = numpy.broadcast_arrays(
+            *map(numpy.atleast_1d, [left, right, bottom, top])
+        )
+        rect_r, rows, row_cov = _pixel_spans(self.y1 - top, self.y1 - bottom)
+        rect_c, cols, col_cov = _pixel_spans(left - self.x0, right - self.x0)
+        # pair each row of a rectangle with each of its columns
+        ncols = numpy.bincount(rect_c, minlength=len(left))
+        col_starts = numpy.cumsum(ncols) - ncols
+        pair_rows = numpy.repeat(numpy.arange(len(rows)), ncols[rect_r])
+        pair_cols = (
+            numpy.arange(len(pair_rows))
+            - numpy.repeat(numpy.cumsum(ncols[rect_r]) - ncols[rect_r], ncols[rect_r])
+            + col_starts[rect_r[pair_rows]]
+        )
+        color = numpy.asarray(color, dtype="float32")
+        if color.ndim > 1:
+            color = color[rect_r[pair_rows]]
+        self._blend(
+            rows[pair_rows],
+            cols[pair_cols],
+            row_cov[pair_rows] * col_cov[pair_cols],
+            color,
+        )
+
+    def draw_bitmaps(self, bitmaps, x, y, color):
+        """Composite coverage `bitmaps` with upper-left pixels at `x`, `y`."""
+        rows = []
+        cols = []
+        for bitmap, row0, col0 in zip(
+            bitmaps,
+            numpy.round(self.y1 - numpy.asarray(y)).astype(int),
+            numpy.round(numpy.asarray(x) - self.x0).astype(int),
+        ):
+            nrows, ncols = bitmap.shape
+            rows.append(numpy.repeat(numpy.arange(row0, row0 + nrows), ncols))
+            cols.append(numpy.tile(numpy.arange(col0, col0 + ncols), nrows))
+        if rows:
+            self._blend(
+                numpy.concatenate(rows),
+                numpy.concatenate(cols),
+                numpy.concatenate([bitmap.ravel() for bitmap in bitmaps]),
+                color,
+            )
+
+    def draw_glyphs(self, integral, left, right, bottom, top, colors):
+        """Draw a glyph stretched to fill boxes of letters.
+
+        Args:
+            `integral` (numpy.ndarray)
+                Integral image of glyph from :func:`_glyph_coverage`.
+            `left`, `right`, `bottom`, `top` (numpy.ndarray)
+                Box filled by each letter in display pixels.
+            `colors` (numpy.ndarray)
+                RGBA color of each letter.
+
+        Each output pixel is the average coverage of the part of the glyph
+        bitmap within it. This is computed from the integral image at the
+        pixel boundaries, interpolating first along rows and then along
+        columns.
+
+        """
+        left = left - self.x0
+        right = right - self.x0
+        top = self.y1 - top
+        bottom = self.y1 - bottom
+        nrows_glyph = integral.shape[0] - 1
+        ncols_glyph = integral.shape[1] - 1
+        row0 = numpy.floor(top).astype(int)
+        nrows = numpy.ceil(bottom).astype(int) - row0
+        col0 = numpy.floor(left).astype(int)
+        ncols = int((numpy.ceil(right).astype(int) - col0).max())
+        row_scale = nrows_glyph / numpy.maximum(bottom - top, 1e-12)
+        col_scale = ncols_glyph / numpy.maximum(right - left, 1e-12)
+        area = 1 / (row_scale * col_scale)
+        col_offsets = numpy.arange(ncols + 1)
+
+        # process letters in chunks to bound memory
+        npixels = (nrows + 1) * max(ncols + 1, ncols_glyph + 1)
+        chunk_ends = numpy.searchsorted(
+            numpy.cumsum(npixels),
+            numpy.arange(_CHUNK_PIXELS, npixels.sum(), _CHUNK_PIXELS),
+        ).tolist()
+        for start, end in zip([0] + chunk_ends, chunk_ends + [len(left)]):
+            if start >= end:
+                continue
+            # integral image at row boundaries of pixels of each letter
+            nbounds = nrows[start:end] + 1
+            idx = numpy.repeat(numpy.arange(start, end), nbounds)
+            bound = (
+                numpy.arange(len(idx))
+                - numpy.repeat(numpy.cumsum(nbounds) - nbounds, nbounds)
+                + row0[idx]
+            )
+            s = numpy.clip((bound - top[idx]) * row_scale[idx], 0, nrows_glyph)
+            by_row = _lerp_rows(integral, s)
+            # and then at column boundaries
+            t = numpy.clip(
+                (col0[idx, None] + col_offsets - left[idx, None])
+                * col_scale[idx, None],
+                0,
+                ncols_glyph,
+            )
+            j = numpy.minimum(t.astype(int), ncols_glyph - 1)
+            g = t - j
+            at_bounds = numpy.take_along_axis(by_row, j, axis=1) * (
+                1 - g
+            ) + numpy.take_along_axis(by_row, j + 1, axis=1) * (g)
+            # coverage from differences between adjacent boundaries
+            by_col = numpy.diff(at_bounds, axis=1)
+            same_letter = idx[1:] == idx[:-1]
+            coverage = (by_col[1:] - by_col[:-1])[same_letter]
+            idx = idx[:-1][same_letter]
+            rows = bound[:-1][same_letter]
+            coverage *= area[idx, None]
+            self._blend(
+                numpy.repeat(rows, ncols),
+                (col0[idx, None] + col_offsets[:-1]).ravel(),
+                coverage.ravel(),
+                numpy.repeat(colors[idx], ncols, axis=0),
+            )
+
+
+def draw_raster_logo(
+    layout,
+    ax,
+    axes,
+    *,
+    fontfamily,
+    fontaspect,
+    letterpad,
+    letterheightscale,
+    axisfontscale,
+    hide_axis,
+    line_at_zero,
+    draw_letters=True,
+    min_visible_height=None,
+):
+    """Draw logo into an image shown on `ax`.
+
+    Args:
+        `layout` (:class:`dmslogo.layout.LogoLayout`)
+            Layout of logo.
+        `ax` (matplotlib.axes.Axes)
+            Axis of logo, with limits already set.
+        `axes` (list)
+            Overlay axes followed by `ax`.
+        `fontfamily`, `fontaspect`, `letterpad`, `letterheightscale`,
+        `axisfontscale`, `hide_axis`, `draw_letters`, `min_visible_height`
+            Same meaning as for :func:`dmslogo.logo.draw_logo`.
+        `line_at_zero` (bool)
+            Draw a line at zero.
+
+    The image is computed for the current size and position of the axes,
+    so they should not be changed afterwards. `ax` should not have any
+    x-ticks, and its x-label is moved down to make space for the labels
+    drawn in the image.
+
+    """
+    fig = ax.get_figure()
+    dpi = fig.dpi
+    pt = dpi / 72
+    trans = ax.transData
+    axbox = ax.get_window_extent()
+    overlay_axes = axes[:-1]
+
+    ticklen = 5 * pt
+    tickpad = matplotlib.rcParams["xtick.major.pad"] * pt
+    labelsize = 12 * axisfontscale
+    if hide_axis:
+        labels = []
+    else:
+        fontpath = _default_font_path()
+        labels = [
+            _text_coverage(label, labelsize, dpi, fontpath)
+            for label in layout.xticklabels
+        ]
+    label_height = max((label.shape[1] for label in labels), default=0)
+
+    # canvas covers all axes and the x tick labels
+    boxes = [axbox] + [overlay_ax.get_window_extent() for overlay_ax in overlay_axes]
+    x0 = min(box.x0 for box in boxes) - 2 * pt
+    x1 = max(box.x1 for box in boxes) + 2 * pt
+    y0 = axbox.y0 - ticklen - tickpad - label_height - 2 * pt
+    y1 = max(box.y1 for box in boxes) + 2 * pt
+    canvas = _Canvas(
+        int(numpy.floor(max(x0, 0))),
+        int(numpy.floor(max(y0, 0))),
+        int(numpy.ceil(min(x1, fig.bbox.width))),
+        int(numpy.ceil(min(y1, fig.bbox.height))),
+    )
+
+    def to_x(x):
+        return trans.transform(numpy.column_stack([x, numpy.zeros(len(x))]))[:, 0]
+
+    def to_y(y):
+        return trans.transform(numpy.column_stack([numpy.zeros(len(y)), y]))[:, 1]
+
+    # overlays
+    for (overlay, overlay_colors), overlay_ax in zip(
+        layout.overlay_colors.items(), overlay_axes
+    ):
+        box = overlay_ax.get_window_extent()
+        left = to_x(layout.xticks - 0.5)
+        right = to_x(layout.xticks + 0.5)
+        rgba = numpy.array([dmslogo.layout._to_rgba(c) for c in overlay_colors])
+        canvas.fill_rects(left, right, box.y0, box.y1, rgba)
+        black = (0, 0, 0, 1)
+        edges = numpy.union1d(left, right)
+        canvas.fill_rects(
+            edges - pt / 2, edges + pt / 2, box.y0 - pt / 2, box.y1 + pt / 2, black
+        )
+        for y in [box.y0, box.y1]:
+            canvas.fill_rects(
+                left - pt / 2, right + pt / 2, y - pt / 2, y + pt / 2, black
+            )
+
+    ylim = ax.get_ylim()
+
+    # shading
+    if layout.shade_colors is not None:
+        shaded = numpy.flatnonzero([color is not None for color in layout.shade_colors])
+        if len(shaded):
+            rgba = numpy.array(
+                [dmslogo.layout._to_rgba(c) for c in layout.shade_colors[shaded]]
+            )
+            rgba[:, 3] *= layout.shade_alphas[shaded]
+            canvas.fill_rects(
+                to_x(layout.xticks[shaded] - 0.5),
+                to_x(layout.xticks[shaded] + 0.5),
+                axbox.y0,
+                axbox.y1,
+                rgba,
+            )
+
+    # breaks as dotted lines with dashes of 2 and gaps of 5 linewidths
+    if len(layout.breaks):
+        dash_starts = numpy.arange(axbox.y0, axbox.y1, 7 * pt)
+        dash_ends = numpy.minimum(dash_starts + 2 * pt, axbox.y1)
+        for x in to_x(layout.breaks + 0.5):
+            canvas.fill_rects(
+                x - pt / 2,
+                x + pt / 2,
+                dash_starts,
+                dash_ends,
+                (0, 0, 0, 1),
+            )
+
+    # letters
+    if draw_letters:
+        letter_layout = dmslogo.logo._visible_letters(layout, ax, min_visible_height)
+    if draw_letters and len(letter_layout.letters):
+        unique_letters, letter_codes, yscale, yoffset = dmslogo.logo._letter_transforms(
+            letter_layout,
+            ylim,
+            fontfamily=fontfamily,
+            fontaspect=fontaspect,
+            letterpad=letterpad,
+            letterheightscale=letterheightscale,
+        )
+        for code, letter in enumerate(unique_letters):
+            glyph = _glyph_coverage(letter, fontfamily)
+            if glyph is None:
+                continue
+            integral, (gx0, gx1) = glyph
+            ymin, ymax = dmslogo.logo._letter_extent(letter, fontfamily)
+            idx = numpy.flatnonzero(letter_codes == code)
+            site = letter_layout.letter_site[idx]
+            canvas.draw_glyphs(
+                integral,
+                to_x(site + gx0 / fontaspect),
+                to_x(site + gx1 / fontaspect),
+                to_y(yoffset[idx] + ymin * yscale[idx]),
+                to_y(yoffset[idx] + ymax * yscale[idx]),
+                letter_layout.letter_colors[idx],
+            )
+        dmslogo.profiling.count("letters_drawn", len(letter_layout.letters))
+
+    # line at zero
+    if line_at_zero:
+        y = to_y([0])[0]
+        canvas.fill_rects(axbox.x0, axbox.x1, y - pt / 2, y + pt / 2, (0, 0, 0, 1))
+
+    # x ticks and labels
+    if not hide_axis:
+        xticks = to_x(layout.xticks)
+        canvas.fill_rects(
+            xticks - pt / 2,
+            xticks + pt / 2,
+            axbox.y0 - ticklen,
+            axbox.y0,
+            (0, 0, 0, 1),
+        )
+        # labels rotated 90 degrees counterclockwise, centered on ticks
+        rotated = [numpy.rot90(label) for label in labels]
+        canvas.draw_bitmaps(
+            rotated,
+            xticks - numpy.array([label.shape[1] for label in rotated]) / 2,
+            numpy.full(len(rotated), axbox.y0 - ticklen - tickpad),
+            (0, 0, 0, 1),
+        )
+        # move x label below tick labels drawn in image
+        ax.xaxis.labelpad = (
+            matplotlib.rcParams["axes.labelpad"]
+            + (ticklen + tickpad + label_height) / pt
+        )
+
+    # show image without changing axis limits
+    xlim = ax.get_xlim()
+    (ex0, ey0), (ex1, ey1) = trans.inverted().transform(
+        [(canvas.x0, canvas.y0), (canvas.x1, canvas.y1)]
+    )
+    ax.imshow(
+        canvas.image(),
+        extent=(ex0, ex1, ey0, ey1),
+        aspect="auto",
+        interpolation="none",
+        clip_on=False,
+        zorder=3,
+    )
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
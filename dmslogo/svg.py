@@ -0,0 +1,138 @@
+"""
+===
+svg
+===
+
+Write logo letters compactly to SVG.
+
+When a figure is saved as SVG, the outline of each glyph of a
+:class:`dmslogo.letters.LetterCollection` is written once in ``<defs>``,
+and each letter is a ``<use>`` of that outline with a transform placing it
+on the logo.
+
+>>> import io
+>>> import dmslogo
+>>> import dmslogo.testing
+>>> import dmslogo.utils
+>>> data = dmslogo.testing.simulate_dms_data(100, alphabet='ACGT')
+>>> with dmslogo.utils.pyplot_free():
+...     fig, ax = dmslogo.draw_logo(data,
+...                                 x_col='site',
+...                                 letter_col='letter',
+...                                 letter_height_col='height')
+...     svg = io.StringIO()
+...     fig.savefig(svg, format='svg')
+>>> svg = svg.getvalue()
+>>> svg.count('xlink:href="#glyph'), len(data)
+(400, 400)
+>>> svg.count(' id="glyph')
+4
+>>> import re
+>>> glyph_ids = set(re.findall(r'<path id="(glyph[^"]+)"', svg))
+>>> hrefs = set(re.findall(r'<use xlink:href="#(glyph[^"]+)"', svg))
+>>> len(glyph_ids), hrefs == glyph_ids
+(4, True)
+
+The writer uses private attributes of `matplotlib`'s SVG renderer. If a
+version of `matplotlib` lacks them, the letters are drawn as paths instead.
+
+"""
+
+
+import matplotlib
+import matplotlib.colors
+import matplotlib.transforms
+
+import numpy
+
+
+def _fmt(values, decimals):
+    """Format `values` as short strings rounded to `decimals`."""
+    # adding zero turns -0.0 into 0.0
+    return [f"{value:.12g}" for value in (numpy.round(values, decimals) + 0).tolist()]
+
+
+def _can_write_letters_svg(renderer):
+    """Whether `renderer` can be used by :func:`_write_letters_svg`.
+
+    Args:
+        `renderer` (matplotlib.backends.backend_svg.RendererSVG)
+            Renderer writing the SVG.
+
+    >>> _can_write_letters_svg(object())
+    False
+
+    """
+    return all(
+        hasattr(renderer, attr)
+        for attr in ["writer", "height", "_convert_path", "_path_collection_id"]
+    ) and isinstance(renderer._path_collection_id, int)
+
+
+def _write_letters_svg(renderer, collection, transform):
+    """Write :class:`dmslogo.letters.LetterCollection` with `RendererSVG`.
+
+    Args:
+        `renderer` (matplotlib.backends.backend_svg.RendererSVG)
+            Renderer writing the SVG, which :func:`_can_write_letters_svg`.
+        `collection` (:class:`dmslogo.letters.LetterCollection`)
+            Letters to write.
+        `transform` (matplotlib.transforms.Transform)
+            Affine transform from data to display coordinates.
+
+    """
+    writer = renderer.writer
+    glyphs = collection.glyphs
+    glyph_codes = collection.glyph_codes
+    used = numpy.flatnonzero(numpy.bincount(glyph_codes, minlength=len(glyphs)))
+
+    # each glyph in em units, flipped as SVG y-axis points down
+    glyph_ids = {}
+    writer.start("defs")
+    for code in used.tolist():
+        glyph = glyphs[code]
+        if not len(glyph.vertices):
+            continue
+        d = renderer._convert_path(
+            glyph, matplotlib.transforms.Affine2D().scale(1, -1), simplify=False
+        )
+        glyph_ids[code] = f"glyph{renderer._path_collection_id:x}_{code:x}"
+        writer.element("path", id=glyph_ids[code], d=d)
+    writer.end("defs")
+    renderer._path_collection_id += 1
+    hrefs = [f"#{glyph_ids.get(code)}" for code in range(len(glyphs))]
+
+    # transform of each letter from flipped glyph to SVG coordinates
+    matrices = collection.letter_matrices(
+        transform
+        + matplotlib.transforms.Affine2D().scale(1, -1).translate(0, renderer.height)
+    )
+    matrices[:, 2:4] *= -1
+    a, b = _fmt(matrices[0, :2], 5) if len(matrices) else ("", "")
+    c = _fmt(matrices[:, 2], 5)
+    d = _fmt(matrices[:, 3], 5)
+    e = _fmt(matrices[:, 4], 3)
+    f = _fmt(matrices[:, 5], 3)
+
+    # letters of the same color in a group
+    for rgba, indices in collection.color_groups():
+        style = f"fill: {matplotlib.colors.to_hex(rgba)}"
+        if rgba[3] < 1:
+            style += f"; fill-opacity: {rgba[3]:g}"
+        writer.start("g", style=style)
+        for i, code in zip(indices.tolist(), glyph_codes[indices].tolist()):
+            if code in glyph_ids:
+                writer.element(
+                    "use",
+                    attrib={
+                        "xlink:href": hrefs[code],
+                        "transform": f"matrix({a} {b} {c[i]} {d[i]} {e[i]} {f[i]})",
+                    },
+                )
+        writer.end("g")
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
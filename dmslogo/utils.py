@@ -7,11 +7,172 @@ Utility functions for plotting.
 """
 
 
+import contextlib
+import contextvars
+import functools
+import threading
+
+import matplotlib.backends.backend_agg
+import matplotlib.figure
 import matplotlib.pyplot as plt
 import matplotlib.ticker
 
 import numpy
 
+import dmslogo.profiling
+
+
+# list of figures created in `pyplot_free` context, `None` if not in one
+_pyplot_free_figures = contextvars.ContextVar("_pyplot_free_figures", default=None)
+
+# list of figures created by current call of function wrapped by
+# `_close_new_figures_on_error`, `None` if not in one
+_new_figures = contextvars.ContextVar("_new_figures", default=None)
+
+
+@contextlib.contextmanager
+def pyplot_free():
+    """Context manager in which `dmslogo` creates figures without `pyplot`.
+
+    By default, the plotting functions of `dmslogo` create figures with
+    `matplotlib.pyplot` so that they are shown in notebooks, but `pyplot`
+    keeps a reference to every figure until it is closed. Within this
+    context, figures are instead created as plain `matplotlib.figure.Figure`
+    objects with their own Agg canvas, so they are never registered with
+    `pyplot` and are freed as soon as they are no longer used.
+
+    Yields:
+        List that holds all figures created in the context. When the context
+        exits (including by an exception), these figures are cleared, so save
+        figures before leaving the context.
+
+    The setting is held in a context variable, so it only applies to the
+    current thread (or `asyncio` task). Figures created outside the main
+    thread never use `pyplot` (which is not thread-safe) even outside this
+    context, but are only cleared by it if created within it.
+
+    >>> import pandas as pd
+    >>> import dmslogo
+    >>> data = pd.DataFrame({'site': [1, 2],
+    ...                      'letter': ['A', 'C'],
+    ...                      'height': [1.0, 0.5]})
+    >>> nfigs = len(plt.get_fignums())
+    >>> with pyplot_free() as figures:
+    ...     fig, ax = dmslogo.draw_logo(data,
+    ...                                 x_col='site',
+    ...                                 letter_col='letter',
+    ...                                 letter_height_col='height')
+    ...     fig in figures
+    True
+    >>> len(plt.get_fignums()) == nfigs
+    True
+    >>> len(fig.axes)
+    0
+
+    Figures are freed once no longer referenced, however many are drawn:
+
+    >>> import gc
+    >>> import weakref
+    >>> def render():
+    ...     with pyplot_free():
+    ...         fig, ax = dmslogo.draw_logo(data,
+    ...                                     x_col='site',
+    ...                                     letter_col='letter',
+    ...                                     letter_height_col='height')
+    ...         fig.canvas.draw()
+    ...     return weakref.ref(fig)
+    >>> refs = [render() for _ in range(20)]
+    >>> _ = gc.collect()
+    >>> sum(ref() is not None for ref in refs)
+    0
+
+    """
+    figures = []
+    token = _pyplot_free_figures.set(figures)
+    try:
+        yield figures
+    finally:
+        _pyplot_free_figures.reset(token)
+        for fig in figures:
+            fig.clear()
+        figures.clear()
+
+
+def subplots(nrows=1, ncols=1, *, figsize=None, **subplots_kw):
+    """Create a figure and grid of axes like `matplotlib.pyplot.subplots`.
+
+    Within :func:`pyplot_free` or outside the main thread, the figure is
+    not registered with `pyplot`.
+    Figures created by a function decorated with
+    :func:`_close_new_figures_on_error` are closed if that function raises
+    an exception.
+
+    Args:
+        `nrows`, `ncols`, `figsize`, `**subplots_kw`
+            Same meaning as for `matplotlib.pyplot.subplots`.
+
+    Returns:
+        The 2-tuple `(fig, axes)`.
+
+    """
+    figures = _pyplot_free_figures.get()
+    with dmslogo.profiling.phase("figure"):
+        if figures is None and threading.current_thread() is threading.main_thread():
+            fig, axes = plt.subplots(nrows, ncols, figsize=figsize, **subplots_kw)
+        else:
+            fig = matplotlib.figure.Figure(figsize=figsize)
+            matplotlib.backends.backend_agg.FigureCanvasAgg(fig)
+            if figures is not None:
+                figures.append(fig)
+            axes = fig.subplots(nrows, ncols, **subplots_kw)
+    dmslogo.profiling.count("figures_created")
+    new_figures = _new_figures.get()
+    if new_figures is not None:
+        new_figures.append(fig)
+    return fig, axes
+
+
+def _close_new_figures_on_error(func):
+    """Decorate plotting function to close figures it created if it fails.
+
+    Without this, a figure created by `pyplot` before an exception is raised
+    is never closed, as the caller never gets a reference to it.
+
+    >>> import pandas as pd
+    >>> import dmslogo
+    >>> data = pd.DataFrame({'site': [1, 2],
+    ...                      'letter': ['A', 'C'],
+    ...                      'height': [1.0, 0.5]})
+    >>> fignums = plt.get_fignums()
+    >>> dmslogo.draw_logo(data,
+    ...                   x_col='site',
+    ...                   letter_col='letter',
+    ...                   letter_height_col='height',
+    ...                   fixed_ymax=0.1)
+    Traceback (most recent call last):
+      ...
+    ValueError: `max_stack_height` exceeds `yextent`
+    >>> plt.get_fignums() == fignums
+    True
+
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        new_figures = []
+        token = _new_figures.set(new_figures)
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            for fig in new_figures:
+                plt.close(fig)
+                fig.clear()
+            raise
+        finally:
+            _new_figures.reset(token)
+
+    return wrapper
+
 
 class AxLimSetter:
     """Object to determine axis limits from data.
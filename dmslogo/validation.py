@@ -0,0 +1,316 @@
+"""
+==========
+validation
+==========
+
+Checks of the data passed to the plotting functions.
+
+Each check works on whole arrays, factorizing values into integer codes
+where needed, rather than looping over rows or groups in Python. So the
+checks stay fast on data frames with millions of rows. Each check raises a
+`ValueError` describing the first problem it finds:
+
+>>> import pandas as pd
+>>> data = pd.DataFrame({'site': [1, 1, 2, 4],
+...                      'letter': ['A', 'C', 'A', 'A'],
+...                      'label': ['1', '1', '2', '4']})
+>>> check_integer_sites(data['site'])
+>>> check_letters(data['letter'])
+>>> check_unique_mapping(data['site'], data['label'])
+>>> check_unique_letters(data['site'], data['letter'])
+>>> check_sequential_sites(data['site'])
+Traceback (most recent call last):
+  ...
+ValueError: `x_col` not sequential unbroken integers
+
+"""
+
+
+import numpy
+
+import pandas as pd
+
+
+def check_columns(data, cols):
+    """Check that `data` has all columns in `cols`.
+
+    Args:
+        `data` (pandas DataFrame)
+            Data to check.
+        `cols` (list)
+            Names of columns, ignoring any that are `None`.
+
+    >>> check_columns(pd.DataFrame({'site': [1]}), ['site', None, 'height'])
+    Traceback (most recent call last):
+      ...
+    ValueError: `data` lacks column height
+
+    """
+    for col in cols:
+        if (col is not None) and (col not in data.columns):
+            raise ValueError(f"`data` lacks column {col}")
+
+
+def check_integer_sites(sites):
+    """Check that `sites` (array-like) all have integer values.
+
+    >>> check_integer_sites([1, 2.5])
+    Traceback (most recent call last):
+      ...
+    ValueError: `x_col` does not have integer values
+
+    """
+    sites = numpy.asarray(sites)
+    if sites.dtype.kind in "iub":
+        return
+    try:
+        is_integer = sites == numpy.round(sites.astype("float"))
+    except (TypeError, ValueError):
+        is_integer = numpy.zeros(1, dtype="bool")
+    if not numpy.all(is_integer):
+        raise ValueError("`x_col` does not have integer values")
+
+
+def check_letters(letters):
+    """Check that `letters` (array-like) are uppercase single characters.
+
+    Only the distinct letters are checked in Python, so this is fast however
+    many letters there are.
+
+    >>> check_letters(['A', 'c'])
+    Traceback (most recent call last):
+      ...
+    ValueError: letters in `letter_col` must be uppercase
+    >>> check_letters(['A', 'AC'])
+    Traceback (most recent call last):
+      ...
+    ValueError: invalid letter of AC
+
+    """
+    unique_letters = pd.unique(numpy.asarray(letters, dtype="object"))
+    for letter in unique_letters:
+        if isinstance(letter, str) and letter.upper() != letter:
+            raise ValueError("letters in `letter_col` must be uppercase")
+    for letter in unique_letters:
+        if not (isinstance(letter, str) and len(letter) == 1):
+            raise ValueError(f"invalid letter of {letter}")
+
+
+def _codes(*arrays):
+    """Integer code for each row of `arrays`, and the number of codes.
+
+    Rows have the same code if they have equal values in all of `arrays`.
+
+    """
+    codes = numpy.zeros(len(arrays[0]) if arrays else 0, dtype="int64")
+    ncodes = 1
+    for values in arrays:
+        value_codes, uniques = pd.factorize(
+            numpy.asarray(values), use_na_sentinel=False
+        )
+        codes, uniques = pd.factorize(codes * len(uniques) + value_codes)
+        ncodes = len(uniques)
+    return codes.astype("int64"), ncodes
+
+
+def check_unique_mapping(sites, labels, *, groups=()):
+    """Check each of `sites` always has the same one of `labels`.
+
+    Args:
+        `sites`, `labels` (array-like)
+            Site and its label for each row.
+        `groups` (list)
+            Arrays giving the group of each row, if checking each group
+            separately.
+
+    >>> check_unique_mapping([1, 1, 2], ['1', '1a', '2'])
+    Traceback (most recent call last):
+      ...
+    ValueError: not unique mapping of `x_col` to `xtick_col`
+    >>> check_unique_mapping([1, 1, 2], ['1', '1a', '2'], groups=[['a', 'b', 'a']])
+
+    """
+    _, nsites = _codes(*groups, sites)
+    _, npairs = _codes(*groups, sites, labels)
+    if npairs != nsites:
+        raise ValueError("not unique mapping of `x_col` to `xtick_col`")
+
+
+def check_unique_letters(sites, letters, *, groups=()):
+    """Check no letter occurs more than once at a site.
+
+    Args:
+        `sites`, `letters` (array-like)
+            Site and letter for each row.
+        `groups` (list)
+            Arrays giving the group of each row, if checking each group
+            separately.
+
+    >>> check_unique_letters([1, 1, 2, 2], ['A', 'C', 'A', 'A'])
+    Traceback (most recent call last):
+      ...
+    ValueError: duplicate letters for `x_col` 2
+
+    """
+    sites = numpy.asarray(sites)
+    codes, ncodes = _codes(*groups, sites, letters)
+    if ncodes != len(codes):
+        duplicated = pd.Index(codes).duplicated()
+        raise ValueError(f"duplicate letters for `x_col` {sites[duplicated][0]}")
+
+
+def check_sequential_sites(sites, *, groups=()):
+    """Check integer `sites` (array-like) have no gaps in their numbering.
+
+    Args:
+        `sites` (array-like)
+            Site of each row.
+        `groups` (list)
+            Arrays giving the group of each row, if checking each group
+            separately.
+
+    >>> check_sequential_sites([3, 1, 2, 2])
+    >>> check_sequential_sites([1, 3])
+    Traceback (most recent call last):
+      ...
+    ValueError: `x_col` not sequential unbroken integers
+    >>> check_sequential_sites([1, 2, 4, 5], groups=[['a', 'a', 'b', 'b']])
+
+    """
+    sites = numpy.asarray(sites)
+    if not len(sites):
+        return
+    group_codes, ngroups = _codes(*groups, numpy.zeros(len(sites)))
+    site_codes, _ = _codes(group_codes, sites)
+    # first row of each distinct site in each group
+    _, first = numpy.unique(site_codes, return_index=True)
+    group_codes = group_codes[first]
+    sites = sites[first]
+    order = numpy.lexsort((sites, group_codes))
+    nsites = numpy.bincount(group_codes, minlength=ngroups)
+    ends = numpy.cumsum(nsites)
+    span = sites[order][ends - 1] - sites[order][ends - nsites] + 1
+    if numpy.any(span != nsites):
+        raise ValueError("`x_col` not sequential unbroken integers")
+
+
+def validate_logo_data(
+    data,
+    *,
+    x_col,
+    letter_col,
+    letter_height_col,
+    xtick_col=None,
+    color_col=None,
+    drop_na_letter_heights=True,
+    by=None,
+):
+    """Check data for :func:`dmslogo.logo.draw_logo`.
+
+    Call this once on data that you will plot many times, and then plot it
+    with `validate=False` to skip checking it again. :func:`dmslogo.facet_plot`
+    does this for its logo plots.
+
+    Args:
+        `data` (pandas DataFrame)
+            Data to check.
+        `x_col`, `letter_col`, `letter_height_col`, `xtick_col`, `color_col`,
+        `drop_na_letter_heights`
+            Same meaning as for :func:`dmslogo.logo.draw_logo`.
+        `by` (`None` or list)
+            Columns of `data` that separate it into groups each plotted as
+            a separate logo, so letters only need to be unique at each site
+            within each group.
+
+    Raises:
+        `ValueError` if the data cannot be plotted.
+
+    >>> data = pd.DataFrame({'site': [1, 1, 2, 1],
+    ...                      'letter': ['A', 'C', 'A', 'A'],
+    ...                      'height': [1.0, 0.5, 2.0, 1.5],
+    ...                      'group': ['x', 'x', 'x', 'y']})
+    >>> kwargs = {'x_col': 'site',
+    ...           'letter_col': 'letter',
+    ...           'letter_height_col': 'height'}
+    >>> validate_logo_data(data, **kwargs)
+    Traceback (most recent call last):
+      ...
+    ValueError: duplicate letters for `x_col` 1
+    >>> validate_logo_data(data, by=['group'], **kwargs)
+
+    """
+    if xtick_col is None:
+        xtick_col = x_col
+    by = list(by or [])
+    check_columns(data, [letter_height_col, letter_col, x_col, xtick_col, color_col])
+    check_columns(data, by)
+    if drop_na_letter_heights:
+        data = data[data[letter_height_col].notna().to_numpy()]
+    groups = [_codes(*[data[col] for col in by])[0]] if by else []
+    check_letters(data[letter_col])
+    check_integer_sites(data[x_col])
+    check_unique_mapping(data[x_col], data[xtick_col], groups=groups)
+    check_unique_letters(data[x_col], data[letter_col], groups=groups)
+
+
+def validate_line_data(
+    data,
+    *,
+    x_col,
+    height_col,
+    height_col2=None,
+    xtick_col=None,
+    show_col=None,
+    by=None,
+):
+    """Check data for :func:`dmslogo.line.draw_line`.
+
+    Call this once on data that you will plot many times, and then plot it
+    with `validate=False` to skip checking it again. :func:`dmslogo.facet_plot`
+    does this for its line plots.
+
+    Args:
+        `data` (pandas DataFrame)
+            Data to check.
+        `x_col`, `height_col`, `height_col2`, `xtick_col`, `show_col`
+            Same meaning as for :func:`dmslogo.line.draw_line`.
+        `by` (`None` or list)
+            Columns of `data` that separate it into groups each plotted as
+            a separate line plot.
+
+    Raises:
+        `ValueError` if the data cannot be plotted.
+
+    >>> data = pd.DataFrame({'site': [1, 2, 2],
+    ...                      'height': [1.0, 0.5, 2.0]})
+    >>> validate_line_data(data, x_col='site', height_col='height')
+    Traceback (most recent call last):
+      ...
+    ValueError: not unique mapping of `x_col` to other cols ['site', 'height']
+
+    """
+    if xtick_col is None:
+        xtick_col = x_col
+    cols = list(dict.fromkeys([x_col, xtick_col, height_col]))
+    if height_col2 is not None:
+        cols.append(height_col2)
+    if show_col:
+        cols.append(show_col)
+    check_columns(data, cols)
+    if show_col and not data[show_col].dtype == bool:
+        raise ValueError("`show_col` is not bool")
+    by = list(by or [])
+    check_columns(data, by)
+    groups = [_codes(*[data[col] for col in by])[0]] if by else []
+    check_integer_sites(data[x_col])
+    check_sequential_sites(data[x_col], groups=groups)
+    _, nsites = _codes(*groups, data[x_col])
+    _, nrows = _codes(*groups, *[data[col] for col in cols])
+    if nrows != nsites:
+        raise ValueError(f"not unique mapping of `x_col` to other cols {cols}")
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()